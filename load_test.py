@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Load test for the local API server (src/api_server.py).
+
+Starts a server on a temporary data directory (or targets --url) and drives
+many concurrent keep-alive clients against it. Each client polls the week
+and range endpoints with If-None-Match and sometimes writes an entry.
+
+Usage:
+    python load_test.py --clients 300 --requests 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+
+async def request(reader, writer, method, path, headers=None, body=None):
+    """Send one HTTP/1.1 request over a keep-alive connection."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(payload)}"]
+    lines.extend(f"{k}: {v}" for k, v in (headers or {}).items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + payload)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    response_headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        response_headers[name.strip().lower()] = value.strip()
+    length = int(response_headers.get("content-length", 0))
+    data = await reader.readexactly(length) if length else b""
+    return status, response_headers, data
+
+
+async def client(host, port, client_id, num_requests, write_ratio, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    rng = random.Random(client_id)
+    try:
+        for _ in range(num_requests):
+            started = time.perf_counter()
+            if rng.random() < write_ratio:
+                day = rng.randint(1, 28)
+                status, _, _ = await request(
+                    reader, writer, "PUT", f"/entries/2030-02-{day:02d}",
+                    body={"start_time": f"0{rng.randint(7, 9)}:00", "end_time": "16:30"}
+                )
+            else:
+                path = rng.choice(["/week?date=2030-02-12", "/range?start=2030-02-01&end=2030-02-28", "/today"])
+                headers = {"If-None-Match": etags[path]} if path in etags else {}
+                status, response_headers, _ = await request(reader, writer, "GET", path, headers)
+                if "etag" in response_headers:
+                    etags[path] = response_headers["etag"]
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(host, port, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server did not start on {host}:{port}")
+
+
+async def run(host, port, args):
+    latencies, statuses = [], {}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, i, args.requests, args.write_ratio, latencies, statuses)
+        for i in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"Clients:      {args.clients}")
+    print(f"Requests:     {total} in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    print(f"Latency p50:  {latencies[total // 2] * 1000:.1f} ms")
+    print(f"Latency p95:  {latencies[int(total * 0.95)] * 1000:.1f} ms")
+    print(f"Latency p99:  {latencies[int(total * 0.99)] * 1000:.1f} ms")
+    print(f"Status codes: {dict(sorted(statuses.items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Work Time Tracker API server")
+    parser.add_argument("--url", help="Target a running server (default: start one on a temp data dir)")
+    parser.add_argument("--clients", type=int, default=300, help="Concurrent clients (default 300)")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per client (default 50)")
+    parser.add_argument("--write-ratio", type=float, default=0.05, help="Share of PUT requests (default 0.05)")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        asyncio.run(run(url.hostname, url.port or 80, args))
+        return
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "src.api_server", "--port", str(port), "--data-dir", data_dir],
+            cwd=Path(__file__).parent,
+        )
+        try:
+            wait_for_port("127.0.0.1", port)
+            asyncio.run(run("127.0.0.1", port, args))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Local HTTP/JSON service exposing a DataManager to other tools.
+Stdlib-only (asyncio), meant to run on localhost.
+
+Usage:
+    python -m src.api_server --port 8765
+
+Endpoints:
+    GET    /today                      Today's entry and totals
+    GET    /week?date=YYYY-MM-DD       Entries and totals for a week
+    GET    /range?start=...&end=...    Entries and totals for a date range
+    GET    /settings                   Break time and weekly target
+    GET    /entries/YYYY-MM-DD         Single entry
+    PUT    /entries/YYYY-MM-DD         Add or update, body {"start_time": "HH:MM", "end_time": "HH:MM"}
+    DELETE /entries/YYYY-MM-DD         Delete an entry
+    POST   /undo, POST /redo           Revert or reapply the last write made through the server
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from collections import OrderedDict
+from datetime import date as date_cls, datetime
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from src.data_manager import DataManager
+from src.history import CommandHistory
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_SIZE = 64 * 1024
+# Cached GET responses kept per revision and minute, least recently used dropped first
+MAX_CACHE_ENTRIES = 256
+
+# GET endpoints whose responses are cached and served with an ETag
+CACHED_PATHS = ("/today", "/week", "/range", "/settings")
+
+TIME_PATTERN = re.compile(r"[0-9]{2}:[0-9]{2}")
+
+
+class HttpError(Exception):
+    """Error that is sent back to the client as a JSON response."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _check_date(value) -> str:
+    try:
+        if not isinstance(value, str) or date_cls.fromisoformat(value).isoformat() != value:
+            raise ValueError(value)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Invalid date: {value!r}, expected YYYY-MM-DD")
+    return value
+
+
+def _check_time(value, field: str) -> str:
+    try:
+        if not isinstance(value, str) or not TIME_PATTERN.fullmatch(value):
+            raise ValueError(value)
+        datetime.strptime(value, "%H:%M")
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Invalid {field}: {value!r}, expected HH:MM")
+    return value
+
+
+class ApiServer:
+    """Serves one DataManager over HTTP.
+
+    All writes go through a single writer task. Writes that arrive while a
+    save is pending are applied together and saved once. Read responses are
+    cached until the data changes or the clock moves to the next minute
+    (ongoing days change once per minute), and carry an ETag so polling
+    clients get cheap 304 responses.
+    """
+
+    def __init__(self, data_manager: DataManager, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.data_manager = data_manager
+        self.history = CommandHistory(data_manager)
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._cache: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._cache_key: Tuple[int, str] = (-1, "")
+        self.stats = {"requests": 0, "not_modified": 0, "cache_hits": 0, "writes": 0, "saves": 0}
+
+    async def start(self):
+        """Start listening and the writer task."""
+        self._write_queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer())
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        logging.info(f"API server listening on http://{self.host}:{self.port}")
+
+    async def stop(self):
+        """Stop accepting connections and finish pending writes."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._writer_task:
+            await self._write_queue.join()
+            self._writer_task.cancel()
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    # ---- writes -------------------------------------------------------
+
+    async def _submit_write(self, operation: str, *args):
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((operation, args, future))
+        return await future
+
+    async def _writer(self):
+        """Apply queued writes, batching everything queued into one save."""
+        while True:
+            batch = [await self._write_queue.get()]
+            while not self._write_queue.empty():
+                batch.append(self._write_queue.get_nowait())
+
+            results = []
+            try:
+                with self.data_manager.batch():
+                    for operation, args, future in batch:
+                        try:
+                            # Each request is its own undo step, even when saved together
+                            with self.history.step():
+                                result = self._apply_write(operation, args)
+                            results.append((future, result, None))
+                        except ValueError as e:
+                            results.append((future, None, HttpError(HTTPStatus.CONFLICT, str(e))))
+                self.stats["saves"] += 1
+            except Exception as e:
+                logging.error(f"Failed to save batch of {len(batch)} writes: {e}")
+                results = [(future, None, e) for _, _, future in batch]
+
+            # Only answer clients once their change is on disk
+            for future, result, error in results:
+                if not future.done():
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(result)
+            for _ in batch:
+                self._write_queue.task_done()
+            self.stats["writes"] += len(batch)
+
+    def _apply_write(self, operation: str, args) -> Optional[Dict]:
+        if operation == "put":
+            date, start_time, end_time = args
+            self.data_manager.add_entry(date, start_time, end_time)
+            return self.data_manager.get_entry(date)
+        if operation == "delete":
+            (date,) = args
+            self.data_manager.delete_entry(date)
+            return None
+        if operation in ("undo", "redo"):
+            dates = self.history.undo() if operation == "undo" else self.history.redo()
+            return {"dates": dates or []}
+        raise ValueError(f"Unknown write operation: {operation}")
+
+    # ---- reads --------------------------------------------------------
+
+    def _build_today(self, query: Dict) -> Dict:
+        dm = self.data_manager
+        today = self.data_manager.today()
+        return {
+            "date": today,
+            "entry": dm.get_today_entry(),
+            "hours": dm.calculate_daily_work_hours(today),
+            "remaining_hours": dm.calculate_remaining_hours(today),
+            "end_time_for_target": dm.calculate_end_time_for_target(today),
+        }
+
+    def _build_range(self, entries: Dict[str, Dict]) -> Dict:
+        daily_hours = {date: self.data_manager.calculate_daily_work_hours(date) for date in sorted(entries)}
+        return {
+            "entries": entries,
+            "daily_hours": daily_hours,
+            "total_hours": sum(daily_hours.values()),
+        }
+
+    def _build_week(self, query: Dict) -> Dict:
+        date = _check_date(query["date"]) if "date" in query else self.data_manager.today()
+        result = self._build_range(self.data_manager.get_entries_for_week(date))
+        target = self.data_manager.get_target_weekly_hours()
+        result.update({
+            "date": date,
+            "target_hours": target,
+            "remaining_hours": max(0, target - result["total_hours"]),
+        })
+        return result
+
+    def _build_range_response(self, query: Dict) -> Dict:
+        start = _check_date(query.get("start"))
+        end = _check_date(query.get("end"))
+        if start > end:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "start must not be after end")
+        result = self._build_range(self.data_manager.get_entries_in_range(start, end))
+        result.update({"start": start, "end": end})
+        return result
+
+    def _build_settings(self, query: Dict) -> Dict:
+        return {
+            "break_time": self.data_manager.get_break_time(),
+            "target_weekly_hours": self.data_manager.get_target_weekly_hours(),
+        }
+
+    def _cached_get(self, path: str, query: Dict, cache_key: str) -> Tuple[str, bytes]:
+        """Get (etag, body) for a cacheable GET, building it on a miss."""
+        key = (self.data_manager.revision, self.data_manager.now().strftime("%Y-%m-%d %H:%M"))
+        if key != self._cache_key:
+            self._cache.clear()
+            self._cache_key = key
+
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            self._cache.move_to_end(cache_key)
+            return cached
+
+        builders = {
+            "/today": self._build_today,
+            "/week": self._build_week,
+            "/range": self._build_range_response,
+            "/settings": self._build_settings,
+        }
+        body = json.dumps(builders[path](query), sort_keys=True).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self._cache[cache_key] = (etag, body)
+        if len(self._cache) > MAX_CACHE_ENTRIES:
+            self._cache.popitem(last=False)
+        return etag, body
+
+    # ---- HTTP ---------------------------------------------------------
+
+    async def _route(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        """Return (status, extra headers, body bytes) for a request."""
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if method == "GET" and path in CACHED_PATHS:
+            etag, payload = self._cached_get(path, query, target)
+            if etag in headers.get("if-none-match", ""):
+                self.stats["not_modified"] += 1
+                return HTTPStatus.NOT_MODIFIED, {"ETag": etag}, b""
+            return HTTPStatus.OK, {"ETag": etag}, payload
+
+        if path.startswith("/entries/"):
+            date = _check_date(path[len("/entries/"):])
+            if method == "GET":
+                entry = self.data_manager.get_entry(date)
+                if entry is None:
+                    raise HttpError(HTTPStatus.NOT_FOUND, f"No entry for {date}")
+                return HTTPStatus.OK, {}, json.dumps(entry).encode()
+            if method == "PUT":
+                try:
+                    data = json.loads(body or b"{}")
+                except json.JSONDecodeError:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+                if not isinstance(data, dict):
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+                start_time = _check_time(data.get("start_time"), "start_time")
+                end_time = data.get("end_time")
+                if end_time is not None:
+                    _check_time(end_time, "end_time")
+                entry = await self._submit_write("put", date, start_time, end_time)
+                return HTTPStatus.OK, {}, json.dumps(entry).encode()
+            if method == "DELETE":
+                await self._submit_write("delete", date)
+                return HTTPStatus.NO_CONTENT, {}, b""
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+
+        if path in ("/undo", "/redo"):
+            if method != "POST":
+                raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+            result = await self._submit_write(path[1:])
+            return HTTPStatus.OK, {}, json.dumps(result).encode()
+
+        if path in CACHED_PATHS:
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+        raise HttpError(HTTPStatus.NOT_FOUND, f"Unknown path: {path}")
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                if length < 0:
+                    # The body can't be skipped without a valid length
+                    status, extra = HTTPStatus.BAD_REQUEST, {}
+                    payload = json.dumps({"error": "Invalid Content-Length"}).encode()
+                    keep_alive = False
+                elif length > MAX_BODY_SIZE:
+                    status, extra, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {}, b""
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    self.stats["requests"] += 1
+                    try:
+                        status, extra, payload = await self._route(method.upper(), target, headers, body)
+                    except HttpError as e:
+                        status, extra, payload = e.status, {}, json.dumps({"error": e.message}).encode()
+                    except Exception as e:
+                        logging.error(f"Request {method} {target} failed: {e}")
+                        status, extra = HTTPStatus.INTERNAL_SERVER_ERROR, {}
+                        payload = json.dumps({"error": "Internal server error"}).encode()
+
+                lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+                if payload:
+                    lines.append("Content-Type: application/json")
+                lines.append(f"Content-Length: {len(payload)}")
+                lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+                lines.extend(f"{name}: {value}" for name, value in extra.items())
+                writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def main():
+    """Run the API server from the command line."""
+    parser = argparse.ArgumentParser(description="Work Time Tracker local API server")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to bind (default {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default {DEFAULT_PORT})")
+    parser.add_argument("--data-dir", help="Directory with entries.json/settings.json (default: data/)")
+    args = parser.parse_args()
+
+    server = ApiServer(DataManager(args.data_dir), args.host, args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
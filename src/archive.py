@@ -0,0 +1,186 @@
+"""
+Compact archive format for closed years.
+Stores one fixed-width binary record per day and reads it through mmap.
+"""
+import mmap
+import os
+import struct
+from datetime import date as date_cls
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+ARCHIVE_MAGIC = b"WTTA"
+ARCHIVE_SUFFIX = ".wta"
+
+# magic, version, reserved, record count
+HEADER = struct.Struct("<4sHHI")
+# Version 1: date ordinal, start minutes, end minutes
+RECORD = struct.Struct("<IHH")
+# Version 2 adds a break override and an index into the time zone table that
+# follows the records (newline-separated names). Only used when a year has
+# entries with a break override or time zone.
+RECORD_V2 = struct.Struct("<IHHhH")
+RECORD_FORMATS = {1: RECORD, 2: RECORD_V2}
+
+NO_TIME = 0xFFFF  # marks a missing start or end time
+NO_BREAK = -1  # marks a missing break override
+
+
+def _time_to_minutes(value: Optional[str]) -> int:
+    """Convert 'HH:MM' to minutes since midnight, or NO_TIME if not set."""
+    if not value or value in ("ongoing", "None"):
+        return NO_TIME
+    hours, minutes = value.split(":")
+    total = int(hours) * 60 + int(minutes)
+    if not 0 <= total < 24 * 60:
+        raise ValueError(f"Time out of range: {value}")
+    return total
+
+
+def _minutes_to_time(value: int) -> str:
+    """Convert minutes since midnight to 'HH:MM'."""
+    return f"{value // 60:02d}:{value % 60:02d}"
+
+
+def invalid_dates(entries: Dict[str, Dict]) -> List[str]:
+    """Get the dates whose entries can't be stored in the archive format."""
+    invalid = []
+    for date_str, entry in entries.items():
+        try:
+            if date_cls.fromisoformat(date_str).isoformat() != date_str:
+                raise ValueError(f"Not an ISO date: {date_str}")
+            _time_to_minutes(entry.get("start_time"))
+            _time_to_minutes(entry.get("end_time"))
+            if "break" in entry and not 0 <= int(entry["break"]) < 2 ** 15:
+                raise ValueError(f"Break out of range: {entry['break']}")
+        except (ValueError, TypeError, AttributeError):
+            invalid.append(date_str)
+    return sorted(invalid)
+
+
+def archive_path(archive_dir: Path, year: int) -> Path:
+    """Get the archive file path for a year."""
+    return archive_dir / f"{year}{ARCHIVE_SUFFIX}"
+
+
+def write_year_archive(path: Path, entries: Dict[str, Dict]):
+    """Write entries to an archive file, sorted by date.
+
+    Args:
+        path: Target archive file
+        entries: Mapping of 'YYYY-MM-DD' to entry dicts
+    """
+    extended = any("break" in entry or entry.get("tz") for entry in entries.values())
+    version = 2 if extended else 1
+    record_format = RECORD_FORMATS[version]
+    zones = [""]  # index 0 means no time zone
+
+    records = []
+    for date_str, entry in entries.items():
+        record = [
+            date_cls.fromisoformat(date_str).toordinal(),
+            _time_to_minutes(entry.get("start_time")),
+            _time_to_minutes(entry.get("end_time")),
+        ]
+        if extended:
+            zone = entry.get("tz") or ""
+            if zone not in zones:
+                zones.append(zone)
+            record.append(int(entry.get("break", NO_BREAK)))
+            record.append(zones.index(zone))
+        records.append(tuple(record))
+    records.sort()
+
+    buffer = bytearray(HEADER.size + record_format.size * len(records))
+    HEADER.pack_into(buffer, 0, ARCHIVE_MAGIC, version, 0, len(records))
+    offset = HEADER.size
+    for record in records:
+        record_format.pack_into(buffer, offset, *record)
+        offset += record_format.size
+    if extended:
+        buffer += "\n".join(zones[1:]).encode("utf-8")
+
+    # Write to a temp file first so a crash never leaves a half-written archive
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(buffer)
+    os.replace(tmp_path, path)
+
+
+class YearArchive:
+    """Read-only, memory-mapped view of one archived year."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, _, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != ARCHIVE_MAGIC or self.version not in RECORD_FORMATS:
+            self.close()
+            raise ValueError(f"Not a supported archive file: {path}")
+        self._record_format = RECORD_FORMATS[self.version]
+
+        self._zones = [""]
+        if self.version >= 2:
+            table_start = HEADER.size + self._record_format.size * self.count
+            table = self._mm[table_start:].decode("utf-8")
+            if table:
+                self._zones.extend(table.split("\n"))
+
+    def close(self):
+        """Release the mapping and file handle."""
+        self._mm.close()
+        self._file.close()
+
+    def _record(self, index: int) -> Tuple:
+        record_format = self._record_format
+        return record_format.unpack_from(self._mm, HEADER.size + index * record_format.size)
+
+    def _ordinal(self, index: int) -> int:
+        # Only the 4-byte ordinal is read, so a search touches few pages
+        return struct.unpack_from("<I", self._mm, HEADER.size + index * self._record_format.size)[0]
+
+    def _lower_bound(self, ordinal: int) -> int:
+        """Index of the first record with an ordinal >= the given one."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ordinal(mid) < ordinal:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _to_entry(self, start: int, end: int, break_minutes: int = NO_BREAK, zone: int = 0) -> Dict:
+        entry = {}
+        if start != NO_TIME:
+            entry["start_time"] = _minutes_to_time(start)
+        if end != NO_TIME:
+            entry["end_time"] = _minutes_to_time(end)
+        if break_minutes != NO_BREAK:
+            entry["break"] = break_minutes
+        if zone:
+            entry["tz"] = self._zones[zone]
+        return entry
+
+    def get(self, date_str: str) -> Optional[Dict]:
+        """Get the entry for a date, or None if it has no record."""
+        ordinal = date_cls.fromisoformat(date_str).toordinal()
+        index = self._lower_bound(ordinal)
+        if index < self.count:
+            record = self._record(index)
+            if record[0] == ordinal:
+                return self._to_entry(*record[1:])
+        return None
+
+    def iter_range(self, start_date: str, end_date: str) -> Iterator[Tuple[str, Dict]]:
+        """Yield (date, entry) pairs between start_date and end_date inclusive."""
+        first = date_cls.fromisoformat(start_date).toordinal()
+        last = date_cls.fromisoformat(end_date).toordinal()
+        index = self._lower_bound(first)
+        while index < self.count:
+            record = self._record(index)
+            if record[0] > last:
+                break
+            yield date_cls.fromordinal(record[0]).isoformat(), self._to_entry(*record[1:])
+            index += 1
@@ -4,15 +4,33 @@ Uses JSON for persistence.
 """
 import json
 import os
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
 
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+from src.archive import ARCHIVE_SUFFIX, YearArchive, archive_path, invalid_dates, write_year_archive
+
 DATA_DIR = Path(__file__).parent.parent / "data"
 DATA_DIR.mkdir(exist_ok=True)
 ENTRIES_FILE = DATA_DIR / "entries.json"
 SETTINGS_FILE = DATA_DIR / "settings.json"
+ARCHIVE_DIR = DATA_DIR / "archive"
+# Append-only log of entry changes not yet merged into entries.json
+JOURNAL_FILE = DATA_DIR / "entries.journal"
+# Merge the journal into entries.json once it has this many lines
+JOURNAL_COMPACT_LINES = 500
+
+# Minimum breaks by law (German ArbZG): 30 minutes after 6 hours, 45 after 9 hours.
+# Each rule is [worked minutes, break minutes].
+LEGAL_BREAK_RULES = [[6 * 60, 30], [9 * 60, 45]]
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,125 +38,515 @@ logging.basicConfig(
 )
 
 
+@lru_cache(maxsize=None)
+def get_zone(name: str):
+    """Get a time zone by its IANA name, e.g. 'Europe/Berlin'."""
+    if ZoneInfo is None:
+        raise ValueError("Time zones need Python 3.9 or newer")
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone: {name}")
+
+
+@lru_cache(maxsize=4096)
+def _day_offsets(zone_name: str, date_str: str) -> Tuple[int, int]:
+    """UTC offsets in minutes at the start and the end of a local day."""
+    zone = get_zone(zone_name)
+    day = datetime.strptime(date_str, "%Y-%m-%d")
+    first = day.replace(tzinfo=zone).utcoffset()
+    last = (day + timedelta(hours=23, minutes=59)).replace(tzinfo=zone).utcoffset()
+    return int(first.total_seconds()) // 60, int(last.total_seconds()) // 60
+
+
+def utc_offset_minutes(zone_name: str, date_str: str, minutes: int) -> int:
+    """UTC offset in minutes of a local wall-clock time (minutes since midnight)."""
+    first, last = _day_offsets(zone_name, date_str)
+    if first == last:
+        # No DST change on this day, which is every day but two a year
+        return first
+    local = datetime.strptime(date_str, "%Y-%m-%d") + timedelta(minutes=minutes)
+    return int(local.replace(tzinfo=get_zone(zone_name)).utcoffset().total_seconds()) // 60
+
+
 class DataManager:
     """Manages work time entries and user settings."""
 
-    def __init__(self):
+    def __init__(self, data_dir: Optional[Path] = None, autosave: bool = True,
+                 clock: Optional[Callable[[], datetime]] = None):
+        if data_dir is None:
+            self.entries_file = ENTRIES_FILE
+            self.settings_file = SETTINGS_FILE
+            self.archive_dir = ARCHIVE_DIR
+            self.journal_file = JOURNAL_FILE
+        else:
+            data_dir = Path(data_dir)
+            data_dir.mkdir(parents=True, exist_ok=True)
+            self.entries_file = data_dir / ENTRIES_FILE.name
+            self.settings_file = data_dir / SETTINGS_FILE.name
+            self.archive_dir = data_dir / ARCHIVE_DIR.name
+            self.journal_file = data_dir / JOURNAL_FILE.name
+
+        # Source of the current local time; tests and tools can pass a fixed clock
+        self.clock = clock or datetime.now
         self.entries: Dict[str, Dict] = {}
         self.settings = {
             "break_time": 30,  # minutes
             "target_weekly_hours": 40,  # hours
         }
+        self._archives: Dict[int, YearArchive] = {}
+        self._archived_years = set()
+        # Bumped on every change so callers can cache derived values
+        self.revision = 0
+        # With autosave off, changes stay in memory until flush() is called
+        self.autosave = autosave
+        self._batch_depth = 0
+        # Increased each time an outermost batch() starts, see current_batch
+        self._batch_id = 0
+        self._dirty = False
+        # Set by close(); changes after that would never be written
+        self.closed = False
+        # What _write_files has to write: changed dates go to the journal,
+        # settings only when they differ from what is on disk
+        self._changed_dates = set()
+        self._needs_compaction = False
+        self._journal_lines = 0
+        self._saved_settings = {}
+        # Called as callback(date, old_entry, new_entry) after every entry change
+        self._listeners: List[Callable[[str, Optional[Dict], Optional[Dict]], None]] = []
         self._load_data()
 
     def _load_data(self):
         """Load entries and settings from files."""
-        if ENTRIES_FILE.exists():
+        if self.entries_file.exists():
             try:
-                with open(ENTRIES_FILE, "r") as f:
+                with open(self.entries_file, "r") as f:
                     self.entries = json.load(f)
             except (json.JSONDecodeError, IOError):
                 self.entries = {}
 
-        if SETTINGS_FILE.exists():
+        if self.journal_file.exists():
+            with open(self.journal_file, "r") as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except json.JSONDecodeError:
+                        change = None
+                    # A crash while appending can leave a partial last line. Rewrite
+                    # everything on the next save so nothing is appended to it.
+                    if not line.endswith("\n"):
+                        self._needs_compaction = True
+                    if (not isinstance(change, dict) or not isinstance(change.get("date"), str)
+                            or "entry" not in change
+                            or not (change["entry"] is None or isinstance(change["entry"], dict))):
+                        logging.warning(f"Ignoring damaged line in {self.journal_file}")
+                        self._needs_compaction = True
+                        continue
+                    if change["entry"] is None:
+                        self.entries.pop(change["date"], None)
+                    else:
+                        self.entries[change["date"]] = change["entry"]
+                    self._journal_lines += 1
+
+        if self.settings_file.exists():
             try:
-                with open(SETTINGS_FILE, "r") as f:
+                with open(self.settings_file, "r") as f:
                     self.settings.update(json.load(f))
             except (json.JSONDecodeError, IOError):
                 pass
+        self._saved_settings = json.loads(json.dumps(self.settings))
+
+        if self.archive_dir.exists():
+            for path in self.archive_dir.glob(f"*{ARCHIVE_SUFFIX}"):
+                if path.stem.isdigit():
+                    self._archived_years.add(int(path.stem))
+
+    def _check_open(self):
+        if self.closed:
+            raise RuntimeError(f"DataManager for {self.entries_file.parent} is closed, changes would be lost")
 
     def _save_data(self):
-        """Save entries and settings to files."""
-        with open(ENTRIES_FILE, "w") as f:
+        """Save entries and settings to files (deferred while inside batch())."""
+        self._check_open()
+        self.revision += 1
+        if self._batch_depth or not self.autosave:
+            self._dirty = True
+            return
+        self._write_files()
+
+    @property
+    def dirty(self) -> bool:
+        """Whether there are changes that are not written to disk yet."""
+        return self._dirty
+
+    def flush(self):
+        """Write pending changes to disk."""
+        if self._dirty:
+            # Only clean once written, a failed write has to be retried later
+            self._write_files()
+            self._dirty = False
+
+    def _write_files(self):
+        """Append changed entries to the journal and write settings if they changed."""
+        if self._needs_compaction or self._journal_lines + len(self._changed_dates) > JOURNAL_COMPACT_LINES:
+            self.compact()
+        elif self._changed_dates:
+            lines = [
+                json.dumps({"date": date, "entry": self.entries.get(date)}, default=str) + "\n"
+                for date in sorted(self._changed_dates)
+            ]
+            with open(self.journal_file, "a") as f:
+                f.write("".join(lines))
+            self._journal_lines += len(lines)
+            self._changed_dates.clear()
+
+        if self.settings != self._saved_settings:
+            with open(self.settings_file, "w") as f:
+                json.dump(self.settings, f, indent=2)
+            self._saved_settings = json.loads(json.dumps(self.settings))
+
+    def merge_journal(self):
+        """Compact if the journal holds any changes, e.g. on a clean shutdown."""
+        if self.journal_file.exists() or self._needs_compaction:
+            self.compact()
+
+    def compact(self):
+        """Write all entries to entries.json and empty the journal."""
+        tmp_path = self.entries_file.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
             json.dump(self.entries, f, indent=2, default=str)
+        os.replace(tmp_path, self.entries_file)
+        if self.journal_file.exists():
+            self.journal_file.unlink()
+        self._journal_lines = 0
+        self._changed_dates.clear()
+        self._needs_compaction = False
 
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(self.settings, f, indent=2)
+    def close(self):
+        """Release memory-mapped archives. Unsaved changes are not written.
 
-    def add_entry(self, date: str, start_time: str, end_time: Optional[str] = None):
+        Later changes raise RuntimeError instead of being silently dropped.
+        """
+        self.closed = True
+        for archive in self._archives.values():
+            archive.close()
+        self._archives.clear()
+
+    @contextmanager
+    def batch(self):
+        """Group several changes so they are written to disk once at the end.
+
+        Example:
+            with data_manager.batch():
+                data_manager.add_entry("2025-12-01", "08:00", "16:00")
+                data_manager.add_entry("2025-12-02", "08:30", "16:30")
+        """
+        if not self._batch_depth:
+            self._batch_id += 1
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self.autosave:
+                self.flush()
+
+    @property
+    def current_batch(self) -> Optional[int]:
+        """Id of the batch() currently running, or None outside of a batch."""
+        return self._batch_id if self._batch_depth else None
+
+    def add_listener(self, callback: Callable[[str, Optional[Dict], Optional[Dict]], None]):
+        """Register a callback(date, old_entry, new_entry) that runs after each entry change."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str, Optional[Dict], Optional[Dict]], None]):
+        """Unregister a callback added with add_listener."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, date: str, old_entry: Optional[Dict]):
+        self._check_open()
+        self._changed_dates.add(date)
+        new_entry = self.entries.get(date)
+        new_entry = dict(new_entry) if new_entry is not None else None
+        for callback in list(self._listeners):
+            callback(date, old_entry, new_entry)
+
+    def _snapshot(self, date: str) -> Optional[Dict]:
+        entry = self.entries.get(date)
+        return dict(entry) if entry is not None else None
+
+    def add_entry(self, date: str, start_time: str, end_time: Optional[str] = None,
+                  tz: Optional[str] = None):
         """Add or update a work entry for a specific date.
         
         Args:
             date: Date string in format 'YYYY-MM-DD'
             start_time: Start time in format 'HH:MM'
             end_time: End time in format 'HH:MM' (optional, None means still working)
+            tz: IANA time zone the times are in (optional, default is the settings time zone)
         """
+        self._check_not_archived(date)
+        if tz:
+            get_zone(tz)
+        old_entry = self._snapshot(date)
         if date not in self.entries:
             self.entries[date] = {}
 
         self.entries[date]["start_time"] = start_time
         if end_time:
             self.entries[date]["end_time"] = end_time
+        if tz:
+            self.entries[date]["tz"] = tz
 
+        self._notify(date, old_entry)
         self._save_data()
 
+    def set_break_override(self, date: str, minutes: Optional[int]):
+        """Set the break for one date, overriding break rules (None removes the override)."""
+        self._check_not_archived(date)
+        if date not in self.entries:
+            raise ValueError(f"No entry for {date}")
+        old_entry = self._snapshot(date)
+        if minutes is None:
+            self.entries[date].pop("break", None)
+        else:
+            self.entries[date]["break"] = int(minutes)
+        if self.entries[date] == old_entry:
+            return
+
+        self._notify(date, old_entry)
+        self._save_data()
+
+    def replace_entry(self, date: str, entry: Optional[Dict]):
+        """Set the entry for a date to exactly the given dict, or delete it if None.
+
+        Used to apply changes coming from sync or undo.
+        """
+        self._check_not_archived(date)
+        old_entry = self._snapshot(date)
+        if old_entry == entry:
+            return
+        if entry is None:
+            del self.entries[date]
+        else:
+            self.entries[date] = dict(entry)
+
+        self._notify(date, old_entry)
+        self._save_data()
+
+    def now(self) -> datetime:
+        """Get the current local time from the clock."""
+        return self.clock()
+
+    def today(self) -> str:
+        """Get today's date as 'YYYY-MM-DD'."""
+        return self.now().strftime("%Y-%m-%d")
+
     def get_entry(self, date: str) -> Optional[Dict]:
         """Get entry for a specific date."""
-        return self.entries.get(date)
+        entry = self.entries.get(date)
+        if entry is None and self.is_archived(date):
+            return self._get_archive(int(date[:4])).get(date)
+        return entry
 
     def get_today_entry(self) -> Optional[Dict]:
         """Get today's entry."""
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = self.today()
         return self.get_entry(today)
 
     def get_entries_for_week(self, target_date: Optional[str] = None) -> Dict[str, Dict]:
         """Get all entries for the week containing target_date (or today if not specified)."""
         if target_date is None:
-            target_date = datetime.now().strftime("%Y-%m-%d")
+            target_date = self.today()
 
         date_obj = datetime.strptime(target_date, "%Y-%m-%d")
         # Calculate Monday of this week (assuming week starts on Monday)
         monday = date_obj - timedelta(days=date_obj.weekday())
         sunday = monday + timedelta(days=6)
 
-        week_entries = {}
-        current = monday
-        while current <= sunday:
-            date_str = current.strftime("%Y-%m-%d")
-            if date_str in self.entries:
-                week_entries[date_str] = self.entries[date_str]
-            current += timedelta(days=1)
+        return self.get_entries_in_range(monday.strftime("%Y-%m-%d"), sunday.strftime("%Y-%m-%d"))
+
+    def get_entries_in_range(self, start_date: str, end_date: str) -> Dict[str, Dict]:
+        """Get all entries between start_date and end_date (inclusive).
+
+        Archived years are scanned straight from their memory-mapped files,
+        so only the pages holding the requested range are touched.
+        """
+        range_entries = {}
+        start_obj = datetime.strptime(start_date, "%Y-%m-%d")
+        end_obj = datetime.strptime(end_date, "%Y-%m-%d")
+
+        for year in range(start_obj.year, end_obj.year + 1):
+            year_start = max(start_obj, datetime(year, 1, 1)).strftime("%Y-%m-%d")
+            year_end = min(end_obj, datetime(year, 12, 31)).strftime("%Y-%m-%d")
+            if year in self._archived_years:
+                range_entries.update(self._get_archive(year).iter_range(year_start, year_end))
+                continue
+
+            current = datetime.strptime(year_start, "%Y-%m-%d")
+            last = datetime.strptime(year_end, "%Y-%m-%d")
+            while current <= last:
+                date_str = current.strftime("%Y-%m-%d")
+                if date_str in self.entries:
+                    range_entries[date_str] = self.entries[date_str]
+                current += timedelta(days=1)
+
+        return range_entries
+
+    def is_archived(self, date: str) -> bool:
+        """Check whether a date belongs to an archived (closed) year."""
+        return date[:4].isdigit() and int(date[:4]) in self._archived_years
+
+    def get_archived_years(self) -> List[int]:
+        """Get all archived years in ascending order."""
+        return sorted(self._archived_years)
+
+    def _get_archive(self, year: int) -> YearArchive:
+        """Open an archived year on first use and keep the mapping around."""
+        if year not in self._archives:
+            self._archives[year] = YearArchive(archive_path(self.archive_dir, year))
+        return self._archives[year]
+
+    def _check_not_archived(self, date: str):
+        if self.is_archived(date):
+            raise ValueError(f"{date} belongs to the archived year {date[:4]} and can't be changed")
+
+    def archive_year(self, year: int):
+        """Move all entries of a closed year into the compact archive format.
 
-        return week_entries
+        Args:
+            year: Year to archive, must be before the current year
+        """
+        if year >= self.now().year:
+            raise ValueError(f"Only closed years can be archived, {year} is not closed yet")
+        if year in self._archived_years:
+            raise ValueError(f"Year {year} is already archived")
+
+        prefix = f"{year}-"
+        year_entries = {d: e for d, e in self.entries.items() if d.startswith(prefix)}
+        if not year_entries:
+            raise ValueError(f"No entries to archive for {year}")
+        invalid = invalid_dates(year_entries)
+        if invalid:
+            raise ValueError(f"Entries of {', '.join(invalid)} can't be archived, please fix them first")
+
+        self.archive_dir.mkdir(exist_ok=True)
+        write_year_archive(archive_path(self.archive_dir, year), year_entries)
+        self._archived_years.add(year)
+
+        for date in year_entries:
+            del self.entries[date]
+        self._needs_compaction = True
+        self._save_data()
+
+    def archive_closed_years(self) -> List[int]:
+        """Archive every closed year that still has entries in the JSON file.
+
+        Returns the list of years that were archived.
+        """
+        current_year = self.now().year
+        years = set()
+        for date in self.entries:
+            if date[:4].isdigit() and int(date[:4]) < current_year:
+                years.add(int(date[:4]))
+
+        for year in sorted(years):
+            if year in self._archived_years:
+                logging.warning(f"Year {year} is archived but still has JSON entries, skipping")
+                years.discard(year)
+
+        # Check every year first so nothing is archived when one of them fails
+        invalid = invalid_dates({d: e for d, e in self.entries.items() if d[:4].isdigit() and int(d[:4]) in years})
+        if invalid:
+            raise ValueError(f"Entries of {', '.join(invalid)} can't be archived, please fix them first")
+
+        archived = []
+        for year in sorted(years):
+            self.archive_year(year)
+            archived.append(year)
+        return archived
    
     def remove_end_time(self, date_str):
-        """Remove end_time from specific date in entries.json."""
-        entries_path = os.path.join("data", "entries.json")
-        # Load the file
-        try:
-            with open(entries_path, "r") as f:
-                entries = json.load(f)
-        except FileNotFoundError:
-            entries = {}
-        # Remove end_time for the specified date
-        if date_str in entries and "end_time" in entries[date_str]:
-            del entries[date_str]["end_time"]
-            # Save file
-            with open(entries_path, "w") as f:
-                json.dump(entries, f, indent=2)
+        """Remove end_time from specific date, marking it as ongoing."""
+        self._check_not_archived(date_str)
+        if date_str in self.entries and "end_time" in self.entries[date_str]:
+            old_entry = self._snapshot(date_str)
+            del self.entries[date_str]["end_time"]
+            self._notify(date_str, old_entry)
+            self._save_data()
 
-    def calculate_daily_work_hours(self, date_str):
-        entry = self.get_entry(date_str)
-        if not entry or "start_time" not in entry:
-            return 0.0
+    def _entry_zone(self, entry: Dict) -> Optional[str]:
+        return entry.get("tz") or self.settings.get("timezone")
 
-        start_time = entry["start_time"]
+    def _gross_minutes(self, date_str: str, entry: Dict) -> int:
+        """Minutes between start and end (now if ongoing).
+
+        Uses the entry's (or the settings') time zone so days with a DST
+        change count the real elapsed time.
+        """
+        zone = self._entry_zone(entry)
 
         # If it's ongoing, use current time
         end_time = entry.get("end_time")
         if not end_time or end_time in ("ongoing", "None"):
-            # Use now as end_time for calculation, or return a special value
-            now = datetime.now().strftime("%H:%M")
-            end_time = now
+            now = self.now().astimezone(get_zone(zone)) if zone else self.now()
+            end_time = now.strftime("%H:%M")
+
+        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+        t_start = datetime.strptime(entry["start_time"], "%H:%M")
+        t_end = datetime.strptime(end_time, "%H:%M")
+        start = t_start.hour * 60 + t_start.minute
+        end = t_end.hour * 60 + t_end.minute
+        end_date = date_str
+        # fix if working overnight (very rare): add a day if end before start
+        if end < start:
+            end += 24 * 60
+            end_date = (date_obj + timedelta(days=1)).strftime("%Y-%m-%d")
+
+        gross = end - start
+        if zone:
+            gross -= (utc_offset_minutes(zone, end_date, end % (24 * 60))
+                      - utc_offset_minutes(zone, date_str, start))
+        return gross
+
+    def _break_minutes(self, entry: Dict, gross_minutes: float) -> int:
+        if "break" in entry:
+            return entry["break"]
+        rules = self.settings.get("break_rules")
+        if not rules:
+            return self.get_break_time()
+
+        # Take the longest break required, but never so much that the worked
+        # time drops below the threshold that required it
+        break_minutes = 0
+        for worked_minutes, rule_break in rules:
+            if gross_minutes > worked_minutes:
+                break_minutes = max(break_minutes, min(rule_break, gross_minutes - worked_minutes))
+        return break_minutes
+
+    def get_break_minutes(self, date_str: str) -> int:
+        """Get the break in minutes that applies to a date (override, rules or default)."""
+        entry = self.get_entry(date_str) or {}
+        if "break" in entry or not self.settings.get("break_rules"):
+            return self._break_minutes(entry, 0)
+        if "start_time" not in entry:
+            return 0
+        try:
+            return int(self._break_minutes(entry, self._gross_minutes(date_str, entry)))
+        except ValueError:
+            return 0
+
+    def calculate_daily_work_hours(self, date_str):
+        entry = self.get_entry(date_str)
+        if not entry or "start_time" not in entry:
+            return 0.0
 
         try:
-            t_start = datetime.strptime(f"{date_str} {start_time}", "%Y-%m-%d %H:%M")
-            t_end = datetime.strptime(f"{date_str} {end_time}", "%Y-%m-%d %H:%M")
-            # fix if working overnight (very rare): add a day if end before start
-            if t_end < t_start:
-                t_end += timedelta(days=1)
-            duration = (t_end - t_start).total_seconds() / 3600
-            duration -= self.get_break_time() / 60    # subtract break as hours
+            gross_minutes = self._gross_minutes(date_str, entry)
+            duration = gross_minutes / 60
+            duration -= self._break_minutes(entry, gross_minutes) / 60    # subtract break as hours
             return max(duration, 0)
         except Exception as e:
             # Log and fail hard, never return nonsense
@@ -158,7 +566,7 @@ class DataManager:
     def calculate_remaining_hours(self, target_date: Optional[str] = None) -> float:
         """Calculate remaining hours needed to reach target."""
         if target_date is None:
-            target_date = datetime.now().strftime("%Y-%m-%d")
+            target_date = self.today()
 
         current_weekly = self.calculate_weekly_work_hours(target_date)
         target_hours = self.settings.get("target_weekly_hours", 40)
@@ -172,16 +580,24 @@ class DataManager:
         Returns end time as 'HH:MM' string or None if not possible.
         """
         if date is None:
-            date = datetime.now().strftime("%Y-%m-%d")
+            date = self.today()
 
-        entry = self.get_today_entry() if date == datetime.now().strftime("%Y-%m-%d") else self.get_entry(date)
+        entry = self.get_today_entry() if date == self.today() else self.get_entry(date)
         if not entry or "start_time" not in entry:
             return None
 
         try:
             start = datetime.strptime(entry["start_time"], "%H:%M")
             remaining_hours = self.calculate_remaining_hours(date)
-            break_time = self.settings.get("break_time", 30)
+
+            # A longer day can require a longer break, so repeat until it's stable
+            work_minutes = remaining_hours * 60
+            break_time = self._break_minutes(entry, work_minutes)
+            for _ in range(10):
+                needed = self._break_minutes(entry, work_minutes + break_time)
+                if needed <= break_time:
+                    break
+                break_time = needed
 
             # Total time needed: remaining work hours + break time
             total_minutes = remaining_hours * 60 + break_time
@@ -190,6 +606,14 @@ class DataManager:
             if total_minutes > 8 * 60:
                 return None
 
+            zone = self._entry_zone(entry)
+            if zone:
+                # Add elapsed time in UTC so a DST change moves the wall-clock end
+                local_start = datetime.strptime(f"{date} {entry['start_time']}", "%Y-%m-%d %H:%M")
+                local_start = local_start.replace(tzinfo=get_zone(zone))
+                end_utc = local_start.astimezone(timezone.utc) + timedelta(minutes=total_minutes)
+                return end_utc.astimezone(get_zone(zone)).strftime("%H:%M")
+
             end_time = start + timedelta(minutes=total_minutes)
 
             # Check if end time is reasonable (not exceeding a reasonable work day)
@@ -208,6 +632,35 @@ class DataManager:
         self.settings["target_weekly_hours"] = hours
         self._save_data()
 
+    def set_timezone(self, name: Optional[str]):
+        """Set the default IANA time zone for entries (None means naive wall-clock times)."""
+        if name:
+            get_zone(name)
+        self.settings["timezone"] = name or None
+        self._save_data()
+
+    def get_timezone(self) -> Optional[str]:
+        """Get the default time zone for entries."""
+        return self.settings.get("timezone")
+
+    def set_break_rules(self, rules: Optional[List[List[int]]]):
+        """Set break rules as [worked minutes, break minutes] pairs (None or [] uses break_time)."""
+        self.settings["break_rules"] = [[int(w), int(b)] for w, b in sorted(rules or [])]
+        self._save_data()
+
+    def get_break_rules(self) -> List[List[int]]:
+        """Get break rules as [worked minutes, break minutes] pairs."""
+        return self.settings.get("break_rules") or []
+
+    def set_sync_folder(self, folder: Optional[str]):
+        """Set the shared folder used for device sync (None disables sync)."""
+        self.settings["sync_folder"] = folder
+        self._save_data()
+
+    def get_sync_folder(self) -> Optional[str]:
+        """Get the shared folder used for device sync."""
+        return self.settings.get("sync_folder")
+
     def get_break_time(self) -> int:
         """Get break time in minutes."""
         return self.settings.get("break_time", 30)
@@ -218,6 +671,9 @@ class DataManager:
 
     def delete_entry(self, date: str):
         """Delete an entry for a specific date."""
+        self._check_not_archived(date)
         if date in self.entries:
+            old_entry = self._snapshot(date)
             del self.entries[date]
+            self._notify(date, old_entry)
             self._save_data()
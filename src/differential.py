@@ -0,0 +1,261 @@
+"""
+Differential check of DataManager calculations against a frozen reference.
+
+ReferenceCalculator is a verbatim copy of the original scalar
+implementation of the daily/weekly/remaining/end-time calculations, with
+datetime.now() replaced by a fixed "now". Random entry histories are fed
+to both it and DataManager (through the JSON/journal path, after a reload,
+and through the year archive) and every result has to match. Daily hours
+are also checked through the statistics month tiles.
+
+Only features the reference knows are generated: no time zones, break
+overrides or break rules.
+
+Usage:
+    python -m src.differential --cases 300 --seed 1
+"""
+import argparse
+import logging
+import math
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from src.data_manager import DataManager
+from src.stats import MonthTileCache
+
+
+class ReferenceCalculator:
+    """Frozen copy of the original calculations. Do not optimize or change."""
+
+    def __init__(self, entries: Dict[str, Dict], settings: Dict, now: datetime):
+        self.entries = entries
+        self.settings = settings
+        self.now = now
+
+    def get_entry(self, date: str) -> Optional[Dict]:
+        return self.entries.get(date)
+
+    def get_today_entry(self) -> Optional[Dict]:
+        today = self.now.strftime("%Y-%m-%d")
+        return self.get_entry(today)
+
+    def get_break_time(self) -> int:
+        return self.settings.get("break_time", 30)
+
+    def get_entries_for_week(self, target_date: Optional[str] = None) -> Dict[str, Dict]:
+        if target_date is None:
+            target_date = self.now.strftime("%Y-%m-%d")
+
+        date_obj = datetime.strptime(target_date, "%Y-%m-%d")
+        monday = date_obj - timedelta(days=date_obj.weekday())
+        sunday = monday + timedelta(days=6)
+
+        week_entries = {}
+        current = monday
+        while current <= sunday:
+            date_str = current.strftime("%Y-%m-%d")
+            if date_str in self.entries:
+                week_entries[date_str] = self.entries[date_str]
+            current += timedelta(days=1)
+
+        return week_entries
+
+    def calculate_daily_work_hours(self, date_str):
+        entry = self.get_entry(date_str)
+        if not entry or "start_time" not in entry:
+            return 0.0
+
+        start_time = entry["start_time"]
+
+        end_time = entry.get("end_time")
+        if not end_time or end_time in ("ongoing", "None"):
+            now = self.now.strftime("%H:%M")
+            end_time = now
+
+        try:
+            t_start = datetime.strptime(f"{date_str} {start_time}", "%Y-%m-%d %H:%M")
+            t_end = datetime.strptime(f"{date_str} {end_time}", "%Y-%m-%d %H:%M")
+            if t_end < t_start:
+                t_end += timedelta(days=1)
+            duration = (t_end - t_start).total_seconds() / 3600
+            duration -= self.get_break_time() / 60
+            return max(duration, 0)
+        except Exception:
+            return 0.0
+
+    def calculate_weekly_work_hours(self, target_date: Optional[str] = None) -> float:
+        week_entries = self.get_entries_for_week(target_date)
+        total_hours = 0.0
+
+        for date in week_entries:
+            total_hours += self.calculate_daily_work_hours(date)
+
+        return total_hours
+
+    def calculate_remaining_hours(self, target_date: Optional[str] = None) -> float:
+        if target_date is None:
+            target_date = self.now.strftime("%Y-%m-%d")
+
+        current_weekly = self.calculate_weekly_work_hours(target_date)
+        target_hours = self.settings.get("target_weekly_hours", 40)
+        remaining = target_hours - current_weekly
+
+        return max(0, remaining)
+
+    def calculate_end_time_for_target(self, date: Optional[str] = None) -> Optional[str]:
+        if date is None:
+            date = self.now.strftime("%Y-%m-%d")
+
+        entry = self.get_today_entry() if date == self.now.strftime("%Y-%m-%d") else self.get_entry(date)
+        if not entry or "start_time" not in entry:
+            return None
+
+        try:
+            start = datetime.strptime(entry["start_time"], "%H:%M")
+            remaining_hours = self.calculate_remaining_hours(date)
+            break_time = self.settings.get("break_time", 30)
+
+            total_minutes = remaining_hours * 60 + break_time
+
+            if total_minutes > 8 * 60:
+                return None
+
+            end_time = start + timedelta(minutes=total_minutes)
+
+            return end_time.strftime("%H:%M")
+
+        except ValueError:
+            return None
+
+
+def _random_time(rng: random.Random) -> str:
+    hour, minute = rng.randrange(24), rng.randrange(60)
+    if rng.random() < 0.05:
+        return f"{hour}:{minute}"  # unpadded, still accepted by strptime
+    return f"{hour:02d}:{minute:02d}"
+
+
+def random_history(rng: random.Random, now: datetime) -> Dict[str, Dict]:
+    """Build random entries around now, including overnight and ongoing days."""
+    entries = {}
+    first_day = now - timedelta(days=rng.randint(7, 500))
+    for _ in range(rng.randint(0, 60)):
+        day = first_day + timedelta(days=rng.randint(0, (now - first_day).days + 7))
+        entry = {"start_time": _random_time(rng)}
+        kind = rng.random()
+        if kind < 0.6:
+            entry["end_time"] = _random_time(rng)
+        elif kind < 0.7:
+            entry["end_time"] = "ongoing"
+        elif kind < 0.75:
+            entry["end_time"] = "None"
+        elif kind < 0.78:
+            entry["end_time"] = "25:61"  # invalid, must count as 0 hours
+        entries[day.strftime("%Y-%m-%d")] = entry
+    # Today is the interesting day for end-time calculations
+    if rng.random() < 0.7:
+        entry = {"start_time": _random_time(rng)}
+        if rng.random() < 0.3:
+            entry["end_time"] = _random_time(rng)
+        entries[now.strftime("%Y-%m-%d")] = entry
+    return entries
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(a, b, rel_tol=0, abs_tol=1e-9)
+    return a == b
+
+
+def check_case(rng: random.Random, data_dir: str) -> List[str]:
+    """Run one random case and return a description of every mismatch."""
+    now = datetime(2020, 1, 1) + timedelta(minutes=rng.randrange(8 * 365 * 24 * 60))
+    entries = random_history(rng, now)
+    settings = {"break_time": rng.choice([0, 15, 30, 36, 45, 90]), "target_weekly_hours": rng.uniform(1, 60)}
+    reference = ReferenceCalculator(entries, settings, now)
+
+    dm = DataManager(data_dir, clock=lambda: now)
+    dm.settings.update(settings)
+    with dm.batch():
+        for date, entry in entries.items():
+            dm.replace_entry(date, entry)
+
+    managers = {"json": dm, "reloaded": DataManager(data_dir, clock=lambda: now)}
+    managers["reloaded"].settings.update(settings)
+
+    # Archive path: move all closed years into the binary archive
+    archived = DataManager(data_dir, clock=lambda: now)
+    archived.settings.update(settings)
+    try:
+        archived.archive_closed_years()
+        managers["archive"] = archived
+    except ValueError:
+        # e.g. an invalid time can't be archived, only the JSON paths are checked
+        archived.close()
+
+    mismatches = []
+    dates = sorted(set(entries) | {now.strftime("%Y-%m-%d")})
+    for name, manager in managers.items():
+        checks = []
+        tiles = MonthTileCache(manager)
+        for date in dates:
+            expected = reference.calculate_daily_work_hours(date)
+            checks.append(("daily", date, expected, manager.calculate_daily_work_hours(date)))
+            tile_hours = tiles.month_hours(int(date[:4]), int(date[5:7]))[int(date[8:10]) - 1]
+            checks.append(("tile", date, expected, tile_hours))
+        for date in rng.sample(dates, min(len(dates), 5)) + [None]:
+            checks.append(("weekly", date, reference.calculate_weekly_work_hours(date),
+                           manager.calculate_weekly_work_hours(date)))
+            checks.append(("remaining", date, reference.calculate_remaining_hours(date),
+                           manager.calculate_remaining_hours(date)))
+            checks.append(("end_time", date, reference.calculate_end_time_for_target(date),
+                           manager.calculate_end_time_for_target(date)))
+        for what, date, expected, actual in checks:
+            if not _same(expected, actual):
+                mismatches.append(
+                    f"{name} {what}({date}) now={now:%Y-%m-%d %H:%M}: expected {expected!r}, got {actual!r}"
+                    f" entry={entries.get(date)}"
+                )
+        tiles.close()
+        manager.close()
+    return mismatches
+
+
+def run(cases: int, seed: int) -> List[str]:
+    """Run random cases and return all mismatches."""
+    rng = random.Random(seed)
+    mismatches = []
+    # Invalid times are expected and logged as errors by DataManager
+    logging.disable(logging.ERROR)
+    try:
+        for _ in range(cases):
+            with tempfile.TemporaryDirectory() as data_dir:
+                mismatches.extend(check_case(rng, data_dir))
+    finally:
+        logging.disable(logging.NOTSET)
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare DataManager calculations with the reference implementation")
+    parser.add_argument("--cases", type=int, default=300, help="Number of random histories (default 300)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed (default: random)")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    started = time.perf_counter()
+    mismatches = run(args.cases, seed)
+    elapsed = time.perf_counter() - started
+
+    for mismatch in mismatches[:20]:
+        print(mismatch)
+    print(f"{args.cases} cases, seed {seed}: {len(mismatches)} mismatches in {elapsed:.2f}s")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Statistics tab: year-at-a-glance heatmap and weekly trend lines.
+Painted with QPainter from the cached month tiles in src/stats.py.
+"""
+from datetime import date as date_cls, timedelta
+from typing import Optional
+
+from PyQt5.QtCore import QPointF, QRect, QRectF, Qt
+from PyQt5.QtGui import QColor, QFont, QPainter, QPen, QPolygonF
+from PyQt5.QtWidgets import QScrollArea, QToolTip, QVBoxLayout, QLabel, QWidget
+
+from src.data_manager import DataManager
+from src.stats import MonthTileCache
+
+CELL = 12  # size of one day square in pixels
+GAP = 2
+LEFT_MARGIN = 30
+TITLE_HEIGHT = 24
+TREND_HEIGHT = 80
+YEAR_SPACING = 24
+# Days with this many hours or more get the darkest color
+MAX_DAY_HOURS = 10.0
+
+HEATMAP_HEIGHT = 7 * (CELL + GAP)
+YEAR_HEIGHT = TITLE_HEIGHT + HEATMAP_HEIGHT + GAP * 4 + TREND_HEIGHT + YEAR_SPACING
+YEAR_WIDTH = LEFT_MARGIN + 54 * (CELL + GAP)
+
+EMPTY_COLOR = QColor(235, 237, 240)
+# Light to dark green, picked by hours / MAX_DAY_HOURS
+SCALE_COLORS = [QColor(198, 228, 139), QColor(123, 201, 111), QColor(35, 154, 59), QColor(25, 97, 39)]
+
+
+def _color_for(hours: float) -> QColor:
+    if hours <= 0:
+        return EMPTY_COLOR
+    index = min(int(hours / MAX_DAY_HOURS * len(SCALE_COLORS)), len(SCALE_COLORS) - 1)
+    return SCALE_COLORS[index]
+
+
+class HeatmapWidget(QWidget):
+    """All years from newest to oldest, one heatmap plus trend line each.
+
+    Only the years that intersect the exposed area are painted, so
+    scrolling costs a handful of tile lookups per frame.
+    """
+
+    def __init__(self, data_manager: DataManager, parent=None):
+        super().__init__(parent)
+        self.data_manager = data_manager
+        self.tiles = MonthTileCache(data_manager)
+        self.years = []
+        self.setMouseTracking(True)
+        self.refresh_years()
+
+    def refresh_years(self):
+        """Update the list of years shown and the widget size."""
+        last = self.data_manager.now().year
+        first = self.tiles.first_year() or last
+        self.years = list(range(last, min(first, last) - 1, -1))
+        self.setMinimumSize(YEAR_WIDTH, YEAR_HEIGHT * len(self.years))
+        self.update()
+
+    def _cell_rect(self, year_top: int, day_index: int, lead: int) -> QRect:
+        column, row = divmod(day_index + lead, 7)
+        x = LEFT_MARGIN + column * (CELL + GAP)
+        y = year_top + TITLE_HEIGHT + row * (CELL + GAP)
+        return QRect(x, y, CELL, CELL)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        exposed = event.rect()
+        title_font = QFont()
+        title_font.setBold(True)
+
+        for position, year in enumerate(self.years):
+            top = position * YEAR_HEIGHT
+            if top > exposed.bottom() or top + YEAR_HEIGHT < exposed.top():
+                continue
+
+            hours = self.tiles.year_hours(year)
+            weeks = self.tiles.weekly_totals(year)
+            lead = date_cls(year, 1, 1).weekday()
+
+            painter.setFont(title_font)
+            painter.setPen(QColor(Qt.black))
+            total = sum(hours)
+            painter.drawText(LEFT_MARGIN, top + TITLE_HEIGHT - 8, f"{year}   {int(total)}h total")
+
+            # Heatmap: one square per day, weeks as columns, Monday on top
+            painter.setPen(Qt.NoPen)
+            for day_index, day_hours in enumerate(hours):
+                painter.fillRect(self._cell_rect(top, day_index, lead), _color_for(day_hours))
+
+            # Weekly trend line with the weekly target as reference
+            chart_top = top + TITLE_HEIGHT + HEATMAP_HEIGHT + GAP * 4
+            chart = QRectF(LEFT_MARGIN, chart_top, 53 * (CELL + GAP), TREND_HEIGHT)
+            painter.fillRect(chart, QColor(248, 248, 248))
+            target = self.data_manager.get_target_weekly_hours()
+            scale = max([target] + [week_hours for _, week_hours in weeks]) or 1.0
+
+            def y_for(value: float) -> float:
+                return chart.bottom() - value / scale * (TREND_HEIGHT - 4)
+
+            painter.setPen(QPen(QColor(200, 80, 80), 1, Qt.DashLine))
+            painter.drawLine(QPointF(chart.left(), y_for(target)), QPointF(chart.right(), y_for(target)))
+
+            if weeks:
+                offset = (7 - lead) % 7  # the first week starts on the first Monday
+                line = QPolygonF([
+                    QPointF(chart.left() + ((offset + index * 7 + lead) // 7 + 0.5) * (CELL + GAP),
+                            y_for(week_hours))
+                    for index, (_, week_hours) in enumerate(weeks)
+                ])
+                painter.setPen(QPen(QColor(35, 110, 200), 2))
+                painter.drawPolyline(line)
+
+        painter.end()
+
+    def date_at(self, x: int, y: int) -> Optional[str]:
+        """Date of the heatmap square at a widget position, if any."""
+        position = y // YEAR_HEIGHT
+        if not 0 <= position < len(self.years):
+            return None
+        year = self.years[position]
+        local_y = y - position * YEAR_HEIGHT - TITLE_HEIGHT
+        if not 0 <= local_y < HEATMAP_HEIGHT or x < LEFT_MARGIN:
+            return None
+        column = (x - LEFT_MARGIN) // (CELL + GAP)
+        row = local_y // (CELL + GAP)
+        day_index = column * 7 + row - date_cls(year, 1, 1).weekday()
+        day = date_cls(year, 1, 1) + timedelta(days=day_index)
+        return day.isoformat() if day.year == year else None
+
+    def mouseMoveEvent(self, event):
+        date = self.date_at(event.pos().x(), event.pos().y())
+        if date is None:
+            QToolTip.hideText()
+            return
+        tile_hours = self.tiles.month_hours(int(date[:4]), int(date[5:7]))[int(date[8:10]) - 1]
+        hours_int = int(tile_hours)
+        minutes = int((tile_hours - hours_int) * 60)
+        QToolTip.showText(event.globalPos(), f"{date}: {hours_int}h {minutes}m", self)
+
+
+class StatisticsTab(QWidget):
+    """Scrollable statistics tab with a heatmap and trend line per year."""
+
+    def __init__(self, data_manager: DataManager, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout()
+
+        title = QLabel("Statistics")
+        title_font = QFont()
+        title_font.setPointSize(14)
+        title_font.setBold(True)
+        title.setFont(title_font)
+        layout.addWidget(title)
+
+        layout.addWidget(QLabel("Hours per day (darker is longer) and weekly totals against your target (dashed)"))
+
+        self.heatmap = HeatmapWidget(data_manager)
+        scroll = QScrollArea()
+        scroll.setWidget(self.heatmap)
+        scroll.setWidgetResizable(True)
+        layout.addWidget(scroll)
+
+        self.setLayout(layout)
+
+    def refresh(self):
+        """Repaint from the tiles (only changed months are rebuilt)."""
+        self.heatmap.refresh_years()
+
+    def close_tiles(self):
+        self.heatmap.tiles.close()
@@ -0,0 +1,113 @@
+"""
+Undo/redo for entry changes.
+Every change of a DataManager is kept as an invertible command (date, old
+entry, new entry) in a bounded ring buffer.
+"""
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional
+
+from src.data_manager import DataManager
+
+DEFAULT_MAX_COMMANDS = 100
+
+
+class Command(NamedTuple):
+    """One entry change; undoing it restores old_entry."""
+    date: str
+    old_entry: Optional[Dict]
+    new_entry: Optional[Dict]
+
+
+class CommandHistory:
+    """Undo/redo stacks for a DataManager.
+
+    Changes made inside one DataManager.batch() form a single undo step,
+    unless step() marks smaller steps inside it.
+    Undo and redo apply only the stored delta through replace_entry, so a
+    step costs one journal append, not a reload or full rewrite of the data.
+    """
+
+    def __init__(self, data_manager: DataManager, max_commands: int = DEFAULT_MAX_COMMANDS):
+        self.data_manager = data_manager
+        # Each item is (step key or None, [Command, ...]); the key is a batch id
+        # or a ("step", n) tuple from step()
+        self._undo = deque(maxlen=max_commands)
+        self._redo = deque(maxlen=max_commands)
+        self._replaying = False
+        self._step = None
+        self._step_count = 0
+        data_manager.add_listener(self._on_change)
+
+    def close(self):
+        """Stop recording changes of the data manager."""
+        self.data_manager.remove_listener(self._on_change)
+
+    @contextmanager
+    def step(self):
+        """Make the changes inside the block one undo step of their own.
+
+        Used where one batch() holds unrelated changes, e.g. the API server
+        saving writes of several clients together.
+        """
+        previous = self._step
+        self._step_count += 1
+        self._step = ("step", self._step_count)
+        try:
+            yield
+        finally:
+            self._step = previous
+
+    def _on_change(self, date: str, old_entry: Optional[Dict], new_entry: Optional[Dict]):
+        if self._replaying:
+            return
+        command = Command(date, old_entry, new_entry)
+        key = self._step if self._step is not None else self.data_manager.current_batch
+        if key is not None and self._undo and self._undo[-1][0] == key:
+            self._undo[-1][1].append(command)
+        else:
+            self._undo.append((key, [command]))
+        self._redo.clear()
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def _apply(self, commands: List[Command], undo: bool):
+        archived = sorted({c.date for c in commands if self.data_manager.is_archived(c.date)})
+        if archived:
+            # Archived years never become editable again, so the step is dropped
+            # instead of blocking every older step
+            raise ValueError(f"The change to {', '.join(archived)} can't be "
+                             f"{'undone' if undo else 'redone'} because its year is archived")
+        self._replaying = True
+        try:
+            with self.data_manager.batch():
+                for command in (reversed(commands) if undo else commands):
+                    entry = command.old_entry if undo else command.new_entry
+                    self.data_manager.replace_entry(command.date, entry)
+        finally:
+            self._replaying = False
+
+    def undo(self) -> Optional[List[str]]:
+        """Revert the last change. Returns the affected dates, or None if there is nothing to undo.
+
+        A change to an archived year raises ValueError and is dropped from the history.
+        """
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        self._apply(step[1], undo=True)
+        self._redo.append(step)
+        return list(dict.fromkeys(command.date for command in step[1]))
+
+    def redo(self) -> Optional[List[str]]:
+        """Apply the last undone change again. Returns the affected dates, or None."""
+        if not self._redo:
+            return None
+        step = self._redo.pop()
+        self._apply(step[1], undo=False)
+        self._undo.append(step)
+        return list(dict.fromkeys(command.date for command in step[1]))
@@ -1,18 +1,23 @@
 """
 Main PyQt5 GUI application for Work Time Tracker.
 """
+import logging
 import sys
-from datetime import datetime, timedelta
+from datetime import timedelta
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem,
     QSpinBox, QDoubleSpinBox, QTimeEdit, QDateEdit, QMessageBox,
-    QTabWidget, QFormLayout, QGroupBox, QComboBox, QDialog, QCheckBox
+    QTabWidget, QFormLayout, QGroupBox, QComboBox, QDialog, QCheckBox,
+    QFileDialog, QAction
 )
-from PyQt5.QtCore import Qt, QTime, QDate, QTimer
-from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QTime, QDate, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont, QKeySequence
 
-from src.data_manager import DataManager
+from src.data_manager import DataManager, LEGAL_BREAK_RULES
+from src.heatmap import StatisticsTab
+from src.history import CommandHistory
+from src.sync import SyncEngine
 
 
 class SettingsDialog(QDialog):
@@ -46,6 +51,20 @@ class SettingsDialog(QDialog):
         self.target_hours_spin.setSuffix(" hours")
         layout.addRow("Target Weekly Hours:", self.target_hours_spin)
 
+        # Legal break rules instead of one fixed break
+        self.break_rules_checkbox = QCheckBox("30 min after 6 h, 45 min after 9 h")
+        self.break_rules_checkbox.setChecked(bool(self.data_manager.get_break_rules()))
+        layout.addRow("Legal Break Rules:", self.break_rules_checkbox)
+
+        # Time zone used for DST-correct durations
+        self.timezone_combo = QComboBox()
+        self.timezone_combo.setEditable(True)
+        self.timezone_combo.addItem("")
+        self.timezone_combo.addItems(["Europe/Berlin", "Europe/London", "America/New_York", "UTC"])
+        self.timezone_combo.setCurrentText(self.data_manager.get_timezone() or "")
+        self.timezone_combo.setToolTip("IANA name, e.g. Europe/Berlin. Empty means local clock times.")
+        layout.addRow("Time Zone:", self.timezone_combo)
+
         # Buttons
         button_layout = QHBoxLayout()
         save_btn = QPushButton("Save")
@@ -63,22 +82,41 @@ class SettingsDialog(QDialog):
 
     def save_settings(self):
         """Save settings and close dialog."""
+        try:
+            self.data_manager.set_timezone(self.timezone_combo.currentText().strip() or None)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
         self.data_manager.set_break_time(self.break_time_spin.value())
         self.data_manager.set_target_weekly_hours(self.target_hours_spin.value())
+        self.data_manager.set_break_rules(LEGAL_BREAK_RULES if self.break_rules_checkbox.isChecked() else [])
         self.accept()
 
 
 class WorkTimeTracker(QMainWindow):
     """Main application window."""
 
-    def __init__(self):
+    # Emitted when the user picks a new sync folder
+    sync_engine_changed = pyqtSignal(object)
+
+    def __init__(self, data_manager: DataManager = None, sync_engine: SyncEngine = None,
+                 history: CommandHistory = None):
         super().__init__()
-        self.data_manager = DataManager()
+        # Only a window that created its data manager merges the journal on close
+        self.owns_data_manager = data_manager is None
+        if data_manager is None:
+            data_manager = DataManager()
+            if data_manager.get_sync_folder():
+                # Attach before any change so every local edit is recorded for sync
+                sync_engine = SyncEngine(data_manager, data_manager.get_sync_folder())
+        self.data_manager = data_manager
+        self.sync_engine = sync_engine
+        self.history = history or CommandHistory(data_manager)
         self.init_ui()
         self.load_today_data()
 
         # Timer to update display every second
-        self.timer = QTimer()
+        self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_display)
         self.timer.start(1000)
 
@@ -87,8 +125,20 @@ class WorkTimeTracker(QMainWindow):
         self.setWindowTitle("Work Time Tracker")
         self.setGeometry(100, 100, 1000, 600)
 
+        # Edit menu with undo/redo
+        edit_menu = self.menuBar().addMenu("Edit")
+        undo_action = QAction("Undo", self)
+        undo_action.setShortcut(QKeySequence.Undo)
+        undo_action.triggered.connect(self.undo)
+        edit_menu.addAction(undo_action)
+        redo_action = QAction("Redo", self)
+        redo_action.setShortcut(QKeySequence.Redo)
+        redo_action.triggered.connect(self.redo)
+        edit_menu.addAction(redo_action)
+
         # Create tab widget
         tabs = QTabWidget()
+        self.tabs = tabs
         self.setCentralWidget(tabs)
 
         # Tab 1: Today's Work
@@ -103,10 +153,17 @@ class WorkTimeTracker(QMainWindow):
         edit_tab = self.create_edit_tab()
         tabs.addTab(edit_tab, "Edit Past Days")
 
-        # Tab 4: Settings
+        # Tab 4: Statistics
+        self.stats_tab = StatisticsTab(self.data_manager)
+        self._stats_key = None
+        tabs.addTab(self.stats_tab, "Statistics")
+
+        # Tab 5: Settings
         settings_tab = self.create_settings_tab()
         tabs.addTab(settings_tab, "Settings")
 
+        tabs.currentChanged.connect(self.update_statistics)
+
     def create_today_tab(self) -> QWidget:
         """Create the today's work tab."""
         widget = QWidget()
@@ -274,6 +331,13 @@ class WorkTimeTracker(QMainWindow):
         self.edit_end_time = QTimeEdit()
         form_layout.addRow("End Time:", self.edit_end_time)
 
+        self.edit_break_spin = QSpinBox()
+        self.edit_break_spin.setMinimum(-1)
+        self.edit_break_spin.setMaximum(240)
+        self.edit_break_spin.setSpecialValueText("Default")
+        self.edit_break_spin.setSuffix(" minutes")
+        form_layout.addRow("Break Override:", self.edit_break_spin)
+
         layout.addLayout(form_layout)
 
         # Buttons
@@ -329,13 +393,48 @@ class WorkTimeTracker(QMainWindow):
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
 
+        # Archive closed years
+        archive_group = QGroupBox("Archive")
+        archive_layout = QVBoxLayout()
+
+        self.settings_archive_label = QLabel()
+        self.update_archive_label()
+        archive_layout.addWidget(self.settings_archive_label)
+
+        archive_btn = QPushButton("Archive Closed Years")
+        archive_btn.clicked.connect(self.archive_closed_years)
+        archive_layout.addWidget(archive_btn)
+
+        archive_group.setLayout(archive_layout)
+        layout.addWidget(archive_group)
+
+        # Device sync
+        sync_group = QGroupBox("Sync")
+        sync_layout = QVBoxLayout()
+
+        self.settings_sync_label = QLabel()
+        self.update_sync_label()
+        sync_layout.addWidget(self.settings_sync_label)
+
+        sync_button_layout = QHBoxLayout()
+        choose_folder_btn = QPushButton("Choose Sync Folder")
+        choose_folder_btn.clicked.connect(self.choose_sync_folder)
+        sync_button_layout.addWidget(choose_folder_btn)
+        sync_now_btn = QPushButton("Sync Now")
+        sync_now_btn.clicked.connect(self.sync_now)
+        sync_button_layout.addWidget(sync_now_btn)
+        sync_layout.addLayout(sync_button_layout)
+
+        sync_group.setLayout(sync_layout)
+        layout.addWidget(sync_group)
+
         layout.addStretch()
         widget.setLayout(layout)
         return widget
 
     def save_today_start_time(self):
         """Save today's starting time."""
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = self.data_manager.today()
         start_time = self.today_start_time.time().toString("HH:mm")
         self.data_manager.add_entry(today, start_time)
         QMessageBox.information(self, "Success", "Start time saved!")
@@ -343,7 +442,7 @@ class WorkTimeTracker(QMainWindow):
 
     def save_today_end_time(self):
         """Save today's ending time."""
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = self.data_manager.today()
         entry = self.data_manager.get_today_entry()
         if not entry or "start_time" not in entry:
             QMessageBox.warning(self, "Error", "Please set start time first!")
@@ -354,8 +453,6 @@ class WorkTimeTracker(QMainWindow):
             self.data_manager.remove_end_time(today)
             QMessageBox.information(self, "Success", "Marked as ongoing!")
             end_time = 'ongoing'
-            if today in self.data_manager.entries and "end_time" in self.data_manager.entries[today]:
-                del self.data_manager.entries[today]["end_time"]
         else:
             end_time = self.today_end_time.time().toString("HH:mm")
             self.data_manager.add_entry(today, entry["start_time"], end_time)
@@ -363,7 +460,7 @@ class WorkTimeTracker(QMainWindow):
         self.update_display()
 
     def load_today_data(self):
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = self.data_manager.today()
         entry = self.data_manager.get_today_entry()
         if entry:
             if "start_time" in entry:
@@ -392,6 +489,7 @@ class WorkTimeTracker(QMainWindow):
             if "end_time" in entry:
                 time_parts = entry["end_time"].split(":")
                 self.edit_end_time.setTime(QTime(int(time_parts[0]), int(time_parts[1])))
+            self.edit_break_spin.setValue(entry.get("break", -1))
 
             hours = self.data_manager.calculate_daily_work_hours(selected_date)
             hours_int = int(hours)
@@ -400,6 +498,7 @@ class WorkTimeTracker(QMainWindow):
         else:
             self.edit_start_time.setTime(QTime(9, 0))
             self.edit_end_time.setTime(QTime(17, 0))
+            self.edit_break_spin.setValue(-1)
             self.edit_info_label.setText("No entry for this date")
 
     def save_edit_changes(self):
@@ -407,8 +506,15 @@ class WorkTimeTracker(QMainWindow):
         selected_date = self.edit_date_selector.date().toString("yyyy-MM-dd")
         start_time = self.edit_start_time.time().toString("HH:mm")
         end_time = self.edit_end_time.time().toString("HH:mm")
-
-        self.data_manager.add_entry(selected_date, start_time, end_time)
+        break_override = self.edit_break_spin.value()
+
+        try:
+            with self.data_manager.batch():
+                self.data_manager.add_entry(selected_date, start_time, end_time)
+                self.data_manager.set_break_override(selected_date, break_override if break_override >= 0 else None)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
         QMessageBox.information(self, "Success", "Entry updated!")
         self.update_display()
 
@@ -422,7 +528,11 @@ class WorkTimeTracker(QMainWindow):
         )
 
         if reply == QMessageBox.Yes:
-            self.data_manager.delete_entry(selected_date)
+            try:
+                self.data_manager.delete_entry(selected_date)
+            except ValueError as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
             QMessageBox.information(self, "Success", "Entry deleted!")
             self.edit_info_label.setText("No entry for this date")
             self.update_display()
@@ -435,9 +545,93 @@ class WorkTimeTracker(QMainWindow):
             self.settings_target_label.setText(f"Target Weekly Hours: {self.data_manager.get_target_weekly_hours()} hours")
             self.update_display()
 
+    def update_archive_label(self):
+        """Show which years are stored in the archive."""
+        years = self.data_manager.get_archived_years()
+        if years:
+            self.settings_archive_label.setText(f"Archived Years: {', '.join(str(y) for y in years)}")
+        else:
+            self.settings_archive_label.setText("Archived Years: none")
+
+    def archive_closed_years(self):
+        """Move all entries of past years into the compact archive."""
+        reply = QMessageBox.question(
+            self, "Confirm Archive",
+            "Archived years can no longer be edited. Archive all closed years?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+
+        if reply == QMessageBox.Yes:
+            try:
+                years = self.data_manager.archive_closed_years()
+            except ValueError as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
+            if years:
+                QMessageBox.information(self, "Success", f"Archived {', '.join(str(y) for y in years)}!")
+            else:
+                QMessageBox.information(self, "Archive", "No closed years to archive.")
+            self.update_archive_label()
+
+    def undo(self):
+        """Revert the last change to an entry."""
+        self._apply_history(self.history.undo, "Undid", "Nothing to undo")
+
+    def redo(self):
+        """Apply the last undone change again."""
+        self._apply_history(self.history.redo, "Redid", "Nothing to redo")
+
+    def _apply_history(self, action, done_text: str, empty_text: str):
+        try:
+            dates = action()
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        if dates is None:
+            self.statusBar().showMessage(empty_text, 3000)
+            return
+        self.statusBar().showMessage(f"{done_text} change to {', '.join(dates)}", 3000)
+        self.load_today_data()
+        self.load_edit_date_data()
+        self.update_display()
+
+    def update_sync_label(self):
+        """Show the configured sync folder."""
+        folder = self.data_manager.get_sync_folder()
+        self.settings_sync_label.setText(f"Sync Folder: {folder or 'not set'}")
+
+    def choose_sync_folder(self):
+        """Pick the shared folder used to sync with other devices."""
+        folder = QFileDialog.getExistingDirectory(self, "Choose Sync Folder")
+        if not folder:
+            return
+        if self.sync_engine:
+            self.sync_engine.close()
+        self.data_manager.set_sync_folder(folder)
+        self.sync_engine = SyncEngine(self.data_manager, folder)
+        self.sync_engine_changed.emit(self.sync_engine)
+        self.update_sync_label()
+
+    def sync_now(self):
+        """Exchange changes with other devices through the sync folder."""
+        if not self.sync_engine:
+            QMessageBox.warning(self, "Error", "Please choose a sync folder first!")
+            return
+        try:
+            result = self.sync_engine.sync()
+        except (IOError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Sync failed: {e}")
+            return
+        QMessageBox.information(
+            self, "Success",
+            f"Sent {result['pushed']} and received {result['pulled']} changes!"
+        )
+        self.load_today_data()
+        self.update_display()
+
     def update_display(self):
         """Update all display elements."""
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = self.data_manager.today()
         
         # Update today's work time
         today_hours = self.data_manager.calculate_daily_work_hours(today)
@@ -446,7 +640,7 @@ class WorkTimeTracker(QMainWindow):
         self.today_work_time_label.setText(f"{hours_int%24}h {minutes}m")
 
         # Update break time display
-        self.today_break_label.setText(f"{self.data_manager.get_break_time()} minutes")
+        self.today_break_label.setText(f"{self.data_manager.get_break_minutes(today)} minutes")
 
         # Update remaining hours
         remaining_hours = self.data_manager.calculate_remaining_hours(today)
@@ -464,12 +658,33 @@ class WorkTimeTracker(QMainWindow):
         # Update weekly summary
         self.update_weekly_summary()
 
+        self.update_statistics()
+
+    def update_statistics(self):
+        """Repaint the statistics tab when it is visible and something changed."""
+        if self.tabs.currentWidget() is not self.stats_tab:
+            return
+        # Ongoing days change once a minute, everything else with the data
+        key = (self.data_manager.revision, self.data_manager.now().strftime("%Y-%m-%d %H:%M"))
+        if key != self._stats_key:
+            self._stats_key = key
+            self.stats_tab.refresh()
+
+    def closeEvent(self, event):
+        """Stop the statistics tiles from following the (possibly shared) data manager."""
+        self.stats_tab.close_tiles()
+        if self.owns_data_manager:
+            try:
+                self.data_manager.merge_journal()
+            except IOError as e:
+                # The journal stays valid and is merged on a later exit
+                logging.error(f"Failed to merge the journal: {e}")
+        super().closeEvent(event)
+
     def on_ongoing_checkbox_changed(self, state):
         if self.ongoing_checkbox.isChecked():
-            today = datetime.now().strftime("%Y-%m-%d")
+            today = self.data_manager.today()
             self.data_manager.remove_end_time(today)
-            if today in self.data_manager.entries and "end_time" in self.data_manager.entries[today]:
-                del self.data_manager.entries[today]["end_time"]
             self.today_end_time.setEnabled(False)
             self.update_display() 
         else:
@@ -528,8 +743,21 @@ class WorkTimeTracker(QMainWindow):
 
 
 def main():
-    """Main entry point."""
+    """Main entry point.
+
+    Pass --tray to start in the system tray without opening the main window,
+    and --idle to also get start/end time proposals from idle detection.
+    """
     app = QApplication(sys.argv)
+
+    if "--tray" in sys.argv:
+        # Imported here so the normal window mode doesn't load the tray module
+        from src.tray import TrayApp
+        if TrayApp.is_available():
+            app.setQuitOnLastWindowClosed(False)
+            tray = TrayApp(idle_detection="--idle" in sys.argv)
+            sys.exit(app.exec_())
+
     window = WorkTimeTracker()
     window.show()
     sys.exit(app.exec_())
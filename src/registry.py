@@ -0,0 +1,253 @@
+"""
+Registry of per-user DataManager instances for a shared team server.
+Keeps hot users in memory and evicts the least recently used ones.
+"""
+import logging
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from src.data_manager import DataManager
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Rough in-memory cost of one manager and of one parsed entry
+# (dict plus key and time strings), used to bound total memory
+MANAGER_BASE_BYTES = 4096
+ENTRY_BYTES = 600
+AGGREGATE_BYTES = 200
+
+USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class _Slot:
+    """A resident manager plus aggregates derived from it."""
+
+    def __init__(self, manager: DataManager):
+        self.manager = manager
+        self.aggregates: Dict[tuple, object] = {}
+        self.aggregates_key = (manager.revision, "")
+        # Number of use() blocks running on this slot; pinned slots are never evicted
+        self.pins = 0
+
+    def size(self) -> int:
+        return (MANAGER_BASE_BYTES
+                + ENTRY_BYTES * len(self.manager.entries)
+                + AGGREGATE_BYTES * len(self.aggregates))
+
+
+class ManagerRegistry:
+    """LRU cache of DataManager instances, one per user.
+
+    Each user's data lives in base_dir/<user_id>/. Managers are loaded on
+    first access and stay resident until the estimated memory of all
+    resident managers exceeds max_bytes (or their number exceeds
+    max_managers); then the least recently used ones are flushed to disk
+    and dropped.
+
+    Managers are created with autosave turned off. Make changes inside
+    use(), which keeps the manager resident while the block runs and writes
+    the changes when it ends. Pass autosave=True to write every change
+    immediately instead.
+    """
+
+    def __init__(self, base_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_managers: Optional[int] = None, autosave: bool = False):
+        self.base_dir = Path(base_dir)
+        self.max_bytes = max_bytes
+        self.max_managers = max_managers
+        self.autosave = autosave
+        self._slots: "OrderedDict[str, _Slot]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "flushes": 0,
+            "flush_failures": 0,
+            "aggregate_hits": 0,
+            "aggregate_misses": 0,
+        }
+
+    def _get_slot(self, user_id: str) -> _Slot:
+        if not USER_ID_PATTERN.match(user_id) or user_id in (".", ".."):
+            raise ValueError(f"Invalid user id: {user_id!r}")
+
+        with self._lock:
+            slot = self._slots.get(user_id)
+            if slot is not None:
+                self.metrics["hits"] += 1
+                self._slots.move_to_end(user_id)
+                return slot
+
+            self.metrics["misses"] += 1
+            slot = _Slot(DataManager(self.base_dir / user_id, autosave=self.autosave))
+            self._slots[user_id] = slot
+            self._evict_if_needed()
+            return slot
+
+    def get(self, user_id: str) -> DataManager:
+        """Get the DataManager for a user, loading it on a miss.
+
+        The manager can be evicted as soon as other users are loaded, after
+        which changes to it raise RuntimeError. Use use() to make changes.
+        """
+        return self._get_slot(user_id).manager
+
+    @contextmanager
+    def use(self, user_id: str):
+        """Use a user's DataManager without it being evicted, then write its changes.
+
+        Example:
+            with registry.use("alice") as manager:
+                manager.add_entry("2025-12-01", "08:00", "16:00")
+        """
+        with self._lock:
+            slot = self._get_slot(user_id)
+            slot.pins += 1
+        try:
+            yield slot.manager
+        finally:
+            with self._lock:
+                slot.pins -= 1
+                if slot.manager.dirty and not slot.manager.closed:
+                    slot.manager.flush()
+                    self.metrics["flushes"] += 1
+                self._evict_if_needed()
+
+    def aggregate(self, user_id: str, key: tuple, compute: Callable[[DataManager], object]):
+        """Get a value derived from a user's data, computing it only when needed.
+
+        Cached values are dropped when the user's data changes or the minute
+        changes (ongoing days grow every minute).
+
+        Args:
+            user_id: User whose manager is used
+            key: Cache key identifying the aggregate, e.g. ("week", "2025-12-01")
+            compute: Called with the manager on a cache miss
+        """
+        with self._lock:
+            return self._aggregate(self._get_slot(user_id), key, compute)
+
+    def _aggregate(self, slot: _Slot, key: tuple, compute: Callable[[DataManager], object]):
+        with self._lock:
+            current = (slot.manager.revision, slot.manager.now().strftime("%Y-%m-%d %H:%M"))
+            if current != slot.aggregates_key:
+                slot.aggregates.clear()
+                slot.aggregates_key = current
+
+            if key in slot.aggregates:
+                self.metrics["aggregate_hits"] += 1
+                return slot.aggregates[key]
+
+            self.metrics["aggregate_misses"] += 1
+            value = compute(slot.manager)
+            slot.aggregates[key] = value
+            self._evict_if_needed()
+            return value
+
+    def week_summary(self, user_id: str, target_date: Optional[str] = None) -> Dict:
+        """Get total, target and remaining hours of a user's week."""
+        if target_date is not None:
+            date_obj = datetime.strptime(target_date, "%Y-%m-%d")
+
+        with self._lock:
+            # Resolve the slot once so a summary counts as a single hit or miss
+            slot = self._get_slot(user_id)
+            if target_date is None:
+                date_obj = datetime.strptime(slot.manager.today(), "%Y-%m-%d")
+            monday = (date_obj - timedelta(days=date_obj.weekday())).strftime("%Y-%m-%d")
+
+            def compute(manager: DataManager) -> Dict:
+                total = manager.calculate_weekly_work_hours(monday)
+                target = manager.get_target_weekly_hours()
+                return {
+                    "week_start": monday,
+                    "total_hours": total,
+                    "target_hours": target,
+                    "remaining_hours": max(0, target - total),
+                }
+
+            return self._aggregate(slot, ("week", monday), compute)
+
+    def resident_bytes(self) -> int:
+        """Estimated memory used by all resident managers."""
+        with self._lock:
+            return sum(slot.size() for slot in self._slots.values())
+
+    def _evict_if_needed(self):
+        failed = set()
+        while (self.resident_bytes() > self.max_bytes
+               or (self.max_managers is not None and len(self._slots) > self.max_managers)):
+            # Never evict the most recently used slot (it is about to be used), pinned
+            # ones, or ones whose changes just failed to be written
+            candidates = [user_id for user_id, slot in list(self._slots.items())[:-1]
+                          if not slot.pins and user_id not in failed]
+            if not candidates:
+                break
+            if not self._evict(candidates[0]):
+                failed.add(candidates[0])
+
+    def _flush(self, user_id: str, slot: _Slot) -> bool:
+        """Write a slot's pending changes; on failure log it and keep them in memory."""
+        if not slot.manager.dirty:
+            return True
+        try:
+            slot.manager.flush()
+        except OSError as e:
+            logging.error(f"Failed to flush data of {user_id}: {e}")
+            self.metrics["flush_failures"] += 1
+            return False
+        self.metrics["flushes"] += 1
+        return True
+
+    def _evict(self, user_id: str) -> bool:
+        """Flush and drop a slot. A slot whose changes can't be written stays resident."""
+        slot = self._slots[user_id]
+        if not self._flush(user_id, slot):
+            return False
+        del self._slots[user_id]
+        slot.manager.close()
+        self.metrics["evictions"] += 1
+        return True
+
+    def evict(self, user_id: str) -> bool:
+        """Flush and drop a user's manager if it is resident.
+
+        Returns False if its changes could not be written; it then stays resident.
+        """
+        with self._lock:
+            return user_id not in self._slots or self._evict(user_id)
+
+    def flush_all(self):
+        """Write all pending changes to disk without evicting anything.
+
+        Raises IOError naming the users whose changes could not be written.
+        """
+        with self._lock:
+            failed = [user_id for user_id, slot in list(self._slots.items()) if not self._flush(user_id, slot)]
+        if failed:
+            raise IOError(f"Could not write data of {', '.join(failed)}")
+
+    def close(self):
+        """Flush and drop all managers.
+
+        Managers whose changes can't be written stay resident, and IOError
+        names their users.
+        """
+        with self._lock:
+            failed = [user_id for user_id in list(self._slots) if not self._evict(user_id)]
+        if failed:
+            raise IOError(f"Could not write data of {', '.join(failed)}")
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Get hit/miss/eviction counters plus current residency."""
+        with self._lock:
+            metrics = dict(self.metrics)
+            metrics["resident"] = len(self._slots)
+            metrics["resident_bytes"] = self.resident_bytes()
+            return metrics
@@ -0,0 +1,114 @@
+"""
+Per-month aggregate tiles for statistics views.
+
+A tile holds the worked hours of every day in one month. Tiles are built
+once and only rebuilt when an entry in their month changes or a setting
+that affects every day (break time, break rules, time zone) changes.
+"""
+import calendar
+from datetime import date as date_cls, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from src.data_manager import DataManager
+
+# Settings that change the hours of every day
+_SETTINGS_KEYS = ("break_time", "break_rules", "timezone")
+
+
+class MonthTile:
+    """Worked hours for each day of one month."""
+
+    def __init__(self, year: int, month: int, hours: List[float], ongoing_days: List[int]):
+        self.year = year
+        self.month = month
+        self.hours = hours
+        # Days without an end time grow with the clock and are recomputed on read
+        self.ongoing_days = ongoing_days
+
+
+class MonthTileCache:
+    """Builds and caches MonthTile objects for a DataManager."""
+
+    def __init__(self, data_manager: DataManager):
+        self.data_manager = data_manager
+        self._tiles: Dict[Tuple[int, int], MonthTile] = {}
+        self._settings_key = self._current_settings_key()
+        self.builds = 0
+        data_manager.add_listener(self._on_change)
+
+    def close(self):
+        """Stop following changes of the data manager."""
+        self.data_manager.remove_listener(self._on_change)
+
+    def _current_settings_key(self):
+        return tuple(repr(self.data_manager.settings.get(key)) for key in _SETTINGS_KEYS)
+
+    def _on_change(self, date: str, old_entry: Optional[Dict], new_entry: Optional[Dict]):
+        self._tiles.pop((int(date[:4]), int(date[5:7])), None)
+
+    def _build(self, year: int, month: int) -> MonthTile:
+        days_in_month = calendar.monthrange(year, month)[1]
+        first = f"{year:04d}-{month:02d}-01"
+        last = f"{year:04d}-{month:02d}-{days_in_month:02d}"
+
+        hours = [0.0] * days_in_month
+        ongoing_days = []
+        for date, entry in self.data_manager.get_entries_in_range(first, last).items():
+            day = int(date[8:10]) - 1
+            hours[day] = self.data_manager.calculate_daily_work_hours(date)
+            end_time = entry.get("end_time")
+            if "start_time" in entry and (not end_time or end_time in ("ongoing", "None")):
+                ongoing_days.append(day)
+        self.builds += 1
+        return MonthTile(year, month, hours, ongoing_days)
+
+    def get_tile(self, year: int, month: int) -> MonthTile:
+        """Get the tile for a month, building it on first use."""
+        settings_key = self._current_settings_key()
+        if settings_key != self._settings_key:
+            self._tiles.clear()
+            self._settings_key = settings_key
+
+        tile = self._tiles.get((year, month))
+        if tile is None:
+            tile = self._build(year, month)
+            self._tiles[(year, month)] = tile
+        return tile
+
+    def month_hours(self, year: int, month: int) -> List[float]:
+        """Worked hours for each day of a month."""
+        tile = self.get_tile(year, month)
+        if not tile.ongoing_days:
+            return tile.hours
+        hours = list(tile.hours)
+        for day in tile.ongoing_days:
+            hours[day] = self.data_manager.calculate_daily_work_hours(f"{year:04d}-{month:02d}-{day + 1:02d}")
+        return hours
+
+    def year_hours(self, year: int) -> List[float]:
+        """Worked hours for each day of a year (365 or 366 values)."""
+        hours = []
+        for month in range(1, 13):
+            hours.extend(self.month_hours(year, month))
+        return hours
+
+    def weekly_totals(self, year: int) -> List[Tuple[str, float]]:
+        """(Monday, total hours) for every week that starts in the year."""
+        hours = self.year_hours(year)
+        first = date_cls(year, 1, 1)
+        offset = (7 - first.weekday()) % 7  # index of the first Monday
+        # The last week runs into the next year
+        hours = hours + self.month_hours(year + 1, 1)[:6]
+
+        totals = []
+        for start in range(offset, len(hours) - 6, 7):
+            if (first + timedelta(days=start)).year != year:
+                break
+            totals.append(((first + timedelta(days=start)).isoformat(), sum(hours[start:start + 7])))
+        return totals
+
+    def first_year(self) -> Optional[int]:
+        """Earliest year with data (JSON entries or archive)."""
+        years = [int(d[:4]) for d in self.data_manager.entries if d[:4].isdigit()]
+        years.extend(self.data_manager.get_archived_years())
+        return min(years) if years else None
@@ -0,0 +1,275 @@
+"""
+Delta-based sync between devices through a shared folder.
+
+Every device appends its changes as operations to its own log file in the
+shared folder (<device_id>.oplog, one JSON object per line) and remembers how
+far it has read each other device's log. A sync only pushes the local ops
+that were not pushed yet and reads the bytes that were appended to the other
+logs since the last sync, so its cost scales with the change, not the history.
+
+Each date carries a version (counter, device_id). A local change bumps the
+counter past the highest one seen for that date. When ops for the same date
+meet, the higher counter wins, and ties go to the larger device id, so all
+devices end up with the same entries no matter in which order they sync.
+
+Usage:
+    python -m src.sync /path/to/shared/folder
+"""
+import argparse
+import hashlib
+import json
+import logging
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.data_manager import DataManager
+
+OPLOG_SUFFIX = ".oplog"
+SYNC_STATE_FILE = "sync_state.json"
+# One outbox per shared folder, named after a hash of its path
+SYNC_OUTBOX_PATTERN = "sync_outbox_{}.jsonl"
+
+
+def _fingerprint(entry: Optional[Dict]) -> Optional[str]:
+    """Short hash of an entry, used to notice changes made without a SyncEngine."""
+    if entry is None:
+        return None
+    return hashlib.sha1(json.dumps(entry, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _append_lines(path: Path, data: bytes):
+    """Append complete lines, first ending a partial line an interrupted append left behind."""
+    with open(path, "ab+") as f:
+        if f.tell():
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+
+
+def _is_op(op) -> bool:
+    return (isinstance(op, dict) and isinstance(op.get("date"), str) and isinstance(op.get("counter"), int)
+            and isinstance(op.get("device"), str) and (op.get("entry") is None or isinstance(op["entry"], dict)))
+
+
+class SyncEngine:
+    """Records local changes of a DataManager and syncs them through a shared folder.
+
+    The sync state (what was pushed, how far other logs were read) is kept
+    per shared folder, so switching folders publishes the history to the new
+    one. Entries that changed while no engine was attached (API server,
+    registry, other tools) are detected and recorded when the engine starts.
+    """
+
+    def __init__(self, data_manager: DataManager, shared_dir: Path):
+        self.data_manager = data_manager
+        self.shared_dir = Path(shared_dir)
+        self.folder_key = str(self.shared_dir.resolve())
+        local_dir = data_manager.entries_file.parent
+        self.state_file = local_dir / SYNC_STATE_FILE
+        folder_hash = hashlib.sha1(self.folder_key.encode()).hexdigest()[:12]
+        self.outbox_file = local_dir / SYNC_OUTBOX_PATTERN.format(folder_hash)
+        self._applying = False
+        self._load_state()
+        self._record_drift()
+        data_manager.add_listener(self._on_local_change)
+
+    def close(self):
+        """Stop recording changes of the data manager."""
+        self.data_manager.remove_listener(self._on_local_change)
+
+    def _load_state(self):
+        self._state_data = None
+        if self.state_file.exists():
+            try:
+                with open(self.state_file, "r") as f:
+                    self._state_data = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                logging.error(f"Sync state {self.state_file} is unreadable, starting over")
+
+        if not isinstance(self._state_data, dict) or "device_id" not in self._state_data:
+            self._state_data = {"device_id": uuid.uuid4().hex}
+        if "folders" not in self._state_data:
+            # Older state files held a single folder's state without saying which
+            self._state_data = {"device_id": self._state_data["device_id"], "folders": {}}
+
+        self.state = self._state_data["folders"].get(self.folder_key)
+        if self.state is None:
+            self.state = {"seq": 0, "versions": {}, "offsets": {}, "entries": {}}
+            self._state_data["folders"][self.folder_key] = self.state
+            # Continue after what this device already pushed to this folder, so
+            # new changes never reuse a (counter, device) version
+            for op in self._read_ops(self.shared_dir / f"{self.device_id}{OPLOG_SUFFIX}"):
+                self._remember(op)
+
+        # Ops recorded after the last sync are only in the outbox
+        for op in self._read_ops(self.outbox_file):
+            self._remember(op)
+
+    def _remember(self, op: Dict):
+        """Update the state with an op this device recorded earlier."""
+        self.state["seq"] = max(self.state["seq"], op.get("seq", 0))
+        if op["counter"] >= self.state["versions"].get(op["date"], [0, ""])[0]:
+            self.state["versions"][op["date"]] = [op["counter"], op["device"]]
+            self.state["entries"][op["date"]] = _fingerprint(op["entry"])
+
+    def _save_state(self):
+        tmp_path = self.state_file.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._state_data, f)
+        tmp_path.replace(self.state_file)
+
+    @property
+    def device_id(self) -> str:
+        return self._state_data["device_id"]
+
+    def _read_ops(self, path: Path) -> List[Dict]:
+        if not path.exists():
+            return []
+        ops = []
+        with open(path, "rb") as f:
+            for line in f:
+                op = self._parse_op(line, path)
+                if op is not None:
+                    ops.append(op)
+        return ops
+
+    @staticmethod
+    def _parse_op(line: bytes, path: Path) -> Optional[Dict]:
+        if not line.strip():
+            return None
+        try:
+            op = json.loads(line)
+        except ValueError:
+            op = None
+        if not _is_op(op):
+            logging.warning(f"Skipping damaged line in {path}")
+            return None
+        return op
+
+    def _record_drift(self):
+        """Record ops for entries that differ from what this device last recorded or applied."""
+        recorded = self.state["entries"]
+        dates = [date for date in recorded if date not in self.data_manager.entries
+                 and recorded[date] is not None and not self.data_manager.is_archived(date)]
+        dates.extend(date for date, entry in self.data_manager.entries.items()
+                     if recorded.get(date) != _fingerprint(entry))
+        for date in sorted(dates):
+            self._record(date, self.data_manager.entries.get(date))
+        if dates:
+            logging.info(f"Recorded {len(dates)} changes made without sync")
+            self._save_state()
+
+    def _record(self, date: str, entry: Optional[Dict]):
+        """Append a local change to the outbox and bump the date's version."""
+        counter = self.state["versions"].get(date, [0, ""])[0] + 1
+        self.state["seq"] += 1
+        op = {
+            "device": self.device_id,
+            "seq": self.state["seq"],
+            "date": date,
+            "counter": counter,
+            "entry": entry,
+        }
+        self.state["versions"][date] = [counter, self.device_id]
+        self.state["entries"][date] = _fingerprint(entry)
+        _append_lines(self.outbox_file, (json.dumps(op) + "\n").encode())
+
+    def _on_local_change(self, date: str, old_entry: Optional[Dict], new_entry: Optional[Dict]):
+        if not self._applying:
+            self._record(date, new_entry)
+
+    def _push(self) -> Dict[str, int]:
+        """Move outbox ops to this device's log in the shared folder."""
+        if not self.outbox_file.exists():
+            return {"ops": 0, "bytes": 0}
+        with open(self.outbox_file, "rb") as f:
+            data = f.read()
+        if data:
+            _append_lines(self.shared_dir / f"{self.device_id}{OPLOG_SUFFIX}", data)
+        # The outbox is the only other record of these versions, so the state
+        # has to be on disk before it goes (a crash in between pushes twice,
+        # which other devices ignore)
+        self._save_state()
+        self.outbox_file.unlink()
+        return {"ops": data.count(b"\n"), "bytes": len(data)}
+
+    def _pull(self) -> Dict[str, object]:
+        """Read ops other devices appended since the last sync."""
+        ops, received = [], 0
+        offsets = self.state["offsets"]
+        for path in sorted(self.shared_dir.glob(f"*{OPLOG_SUFFIX}")):
+            device = path.stem
+            if device == self.device_id:
+                continue
+            offset = offsets.get(device, 0)
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            # Ignore a trailing partial line the other device may still be writing
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                op = self._parse_op(line, path)
+                if op is not None:
+                    ops.append(op)
+            # Damaged lines are skipped for good, not read again on every sync
+            offsets[device] = offset + end
+            received += end
+        return {"ops": ops, "bytes": received}
+
+    def _wins(self, op: Dict) -> bool:
+        current = self.state["versions"].get(op["date"])
+        return current is None or (op["counter"], op["device"]) > tuple(current)
+
+    def sync(self) -> Dict[str, int]:
+        """Exchange changes with the shared folder and merge them.
+
+        Returns counts of pushed/pulled/applied ops and bytes sent/received.
+        """
+        self.shared_dir.mkdir(parents=True, exist_ok=True)
+        pushed = self._push()
+        pulled = self._pull()
+
+        applied = 0
+        self._applying = True
+        try:
+            with self.data_manager.batch():
+                for op in sorted(pulled["ops"], key=lambda o: (o["date"], o["counter"], o["device"])):
+                    if not self._wins(op):
+                        continue
+                    self.state["versions"][op["date"]] = [op["counter"], op["device"]]
+                    try:
+                        self.data_manager.replace_entry(op["date"], op["entry"])
+                        applied += 1
+                    except ValueError as e:
+                        logging.warning(f"Skipping synced change: {e}")
+                    self.state["entries"][op["date"]] = _fingerprint(self.data_manager.entries.get(op["date"]))
+        finally:
+            self._applying = False
+        self._save_state()
+
+        result = {
+            "pushed": pushed["ops"],
+            "pulled": len(pulled["ops"]),
+            "applied": applied,
+            "bytes_sent": pushed["bytes"],
+            "bytes_received": pulled["bytes"],
+        }
+        logging.info(f"Sync finished: {result}")
+        return result
+
+
+def main():
+    """Sync the local data directory with a shared folder once."""
+    parser = argparse.ArgumentParser(description="Sync Work Time Tracker data through a shared folder")
+    parser.add_argument("shared_dir", help="Shared (local or mounted) folder used by all devices")
+    parser.add_argument("--data-dir", help="Directory with entries.json/settings.json (default: data/)")
+    args = parser.parse_args()
+
+    engine = SyncEngine(DataManager(args.data_dir), Path(args.shared_dir))
+    engine.sync()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+System tray mode for Work Time Tracker.
+
+Only a tray icon stays alive all day. Its tooltip is refreshed once a
+minute, and the main window is created when requested and destroyed again
+when closed. Optionally, idle detection proposes start and end times.
+"""
+import ctypes
+import logging
+import re
+import shutil
+import subprocess
+import sys
+from datetime import timedelta
+from typing import Optional
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+from PyQt5.QtWidgets import QAction, QApplication, QMenu, QStyle, QSystemTrayIcon
+
+from src.data_manager import DataManager
+from src.history import CommandHistory
+from src.main import WorkTimeTracker
+from src.sync import SyncEngine
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TOOLTIP_INTERVAL_MS = 60 * 1000  # also the only periodic wakeup in tray mode
+ACTIVE_SECONDS = 60  # input within the last minute counts as active
+DEFAULT_IDLE_MINUTES = 30
+
+
+def get_idle_seconds() -> Optional[float]:
+    """Seconds since the last keyboard/mouse input, or None if unsupported."""
+    if sys.platform == "win32":
+        class LASTINPUTINFO(ctypes.Structure):
+            _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+        info = LASTINPUTINFO()
+        info.cbSize = ctypes.sizeof(info)
+        if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+            return None
+        return (ctypes.windll.kernel32.GetTickCount() - info.dwTime) / 1000.0
+
+    try:
+        if sys.platform == "darwin":
+            output = subprocess.run(
+                ["ioreg", "-c", "IOHIDSystem"], capture_output=True, text=True, timeout=5
+            ).stdout
+            match = re.search(r'"HIDIdleTime" = (\d+)', output)
+            return int(match.group(1)) / 1e9 if match else None
+
+        if shutil.which("xprintidle"):
+            output = subprocess.run(["xprintidle"], capture_output=True, text=True, timeout=5).stdout
+            return int(output.strip()) / 1000.0
+    except (OSError, ValueError, subprocess.SubprocessError):
+        pass
+    return None
+
+
+def get_resource_usage() -> dict:
+    """Peak resident memory of this process in KB (None where unsupported)."""
+    if resource is None:
+        return {"max_rss_kb": None}
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return {"max_rss_kb": max_rss // 1024 if sys.platform == "darwin" else max_rss}
+
+
+class TrayApp(QObject):
+    """Tray icon with a once-a-minute tooltip and an on-demand main window."""
+
+    def __init__(self, data_manager: DataManager = None, idle_detection: bool = False):
+        super().__init__()
+        self.data_manager = data_manager or DataManager()
+        self.sync_engine = None
+        if self.data_manager.get_sync_folder():
+            self.sync_engine = SyncEngine(self.data_manager, self.data_manager.get_sync_folder())
+        # Owned here so undo works across opening and closing the window
+        self.history = CommandHistory(self.data_manager)
+        self.window: Optional[WorkTimeTracker] = None
+        self.wakeups = 0
+
+        self.idle_detection = idle_detection and get_idle_seconds() is not None
+        if idle_detection and not self.idle_detection:
+            logging.warning("Idle detection is not supported on this system")
+        self._proposal = None  # (date, start_time, end_time) waiting for a click
+        self._proposed_for = None  # avoid asking twice for the same start/idle period
+
+        icon = QApplication.style().standardIcon(QStyle.SP_ComputerIcon)
+        self.tray = QSystemTrayIcon(icon, self)
+        self.tray.activated.connect(self.on_activated)
+        self.tray.messageClicked.connect(self.accept_proposal)
+
+        menu = QMenu()
+        open_action = QAction("Open Work Time Tracker", menu)
+        open_action.triggered.connect(self.open_window)
+        menu.addAction(open_action)
+        start_action = QAction("Start Work Now", menu)
+        start_action.triggered.connect(self.start_work_now)
+        menu.addAction(start_action)
+        end_action = QAction("End Work Now", menu)
+        end_action.triggered.connect(self.end_work_now)
+        menu.addAction(end_action)
+        menu.addSeparator()
+        quit_action = QAction("Quit", menu)
+        quit_action.triggered.connect(QApplication.quit)
+        menu.addAction(quit_action)
+        self.menu = menu
+        self.tray.setContextMenu(menu)
+
+        # One wakeup a minute is enough: times have minute resolution
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.VeryCoarseTimer)
+        self.timer.timeout.connect(self.on_tick)
+        self.timer.start(TOOLTIP_INTERVAL_MS)
+
+        self.update_tooltip()
+        self.tray.show()
+        QApplication.instance().aboutToQuit.connect(self.on_quit)
+
+    @staticmethod
+    def is_available() -> bool:
+        return QSystemTrayIcon.isSystemTrayAvailable()
+
+    def on_tick(self):
+        """Refresh the tooltip and check for idle/activity once a minute."""
+        self.wakeups += 1
+        self.update_tooltip()
+        if self.idle_detection:
+            self.check_idle()
+        if self.wakeups % 60 == 0:
+            # Hourly record of what tray mode costs
+            logging.info(f"Tray mode: {self.wakeups} wakeups, {get_resource_usage()}")
+
+    def update_tooltip(self):
+        today = self.data_manager.today()
+        hours = self.data_manager.calculate_daily_work_hours(today)
+        remaining = self.data_manager.calculate_remaining_hours(today)
+        end_time = self.data_manager.calculate_end_time_for_target(today)
+        lines = [
+            f"Time Worked Today: {int(hours)}h {int((hours - int(hours)) * 60)}m",
+            f"Remaining for Target: {int(remaining)}h {int((remaining - int(remaining)) * 60)}m",
+        ]
+        if end_time:
+            lines.append(f"End Time to Reach Target: {end_time}")
+        self.tray.setToolTip("\n".join(lines))
+
+    def on_activated(self, reason):
+        if reason in (QSystemTrayIcon.Trigger, QSystemTrayIcon.DoubleClick):
+            self.open_window()
+
+    def open_window(self):
+        """Show the main window, creating it if needed."""
+        if self.window is None:
+            self.window = WorkTimeTracker(self.data_manager, self.sync_engine, self.history)
+            # Free the whole window (and its one-second timer) when closed
+            self.window.setAttribute(Qt.WA_DeleteOnClose)
+            self.window.destroyed.connect(self.on_window_destroyed)
+            self.window.sync_engine_changed.connect(self.on_sync_engine_changed)
+        self.window.show()
+        self.window.raise_()
+        self.window.activateWindow()
+
+    def on_window_destroyed(self):
+        self.window = None
+        self.update_tooltip()
+
+    def on_quit(self):
+        """Merge the journal into entries.json on a clean exit."""
+        try:
+            self.data_manager.merge_journal()
+        except IOError as e:
+            logging.error(f"Failed to merge the journal: {e}")
+
+    def on_sync_engine_changed(self, sync_engine: SyncEngine):
+        self.sync_engine = sync_engine
+
+    def start_work_now(self):
+        today = self.data_manager.today()
+        self.data_manager.add_entry(today, self.data_manager.now().strftime("%H:%M"))
+        self.update_tooltip()
+
+    def end_work_now(self):
+        entry = self.data_manager.get_today_entry()
+        if not entry or "start_time" not in entry:
+            self.tray.showMessage("Work Time Tracker", "Please set start time first!", QSystemTrayIcon.Warning)
+            return
+        today = self.data_manager.today()
+        self.data_manager.add_entry(today, entry["start_time"], self.data_manager.now().strftime("%H:%M"))
+        self.update_tooltip()
+
+    def check_idle(self):
+        """Propose a start time on first activity and an end time after a long idle period."""
+        idle_seconds = get_idle_seconds()
+        if idle_seconds is None:
+            return
+        now = self.data_manager.now()
+        today = now.strftime("%Y-%m-%d")
+        entry = self.data_manager.get_today_entry()
+        last_activity = (now - timedelta(seconds=idle_seconds)).strftime("%H:%M")
+
+        if not entry or "start_time" not in entry:
+            if idle_seconds < ACTIVE_SECONDS and self._proposed_for != (today, "start"):
+                self._propose((today, last_activity, None), f"Start work at {last_activity}?")
+                self._proposed_for = (today, "start")
+            return
+
+        end_time = entry.get("end_time")
+        ongoing = not end_time or end_time in ("ongoing", "None")
+        idle_minutes = self.data_manager.settings.get("idle_threshold_minutes", DEFAULT_IDLE_MINUTES)
+        if ongoing and idle_seconds >= idle_minutes * 60 and self._proposed_for != (today, last_activity):
+            self._propose(
+                (today, entry["start_time"], last_activity),
+                f"No activity since {last_activity}. End work at {last_activity}?"
+            )
+            self._proposed_for = (today, last_activity)
+
+    def _propose(self, proposal, message: str):
+        self._proposal = proposal
+        self.tray.showMessage("Work Time Tracker", f"{message}\nClick to confirm.", QSystemTrayIcon.Information)
+
+    def accept_proposal(self):
+        """Save the proposed start/end time after the user clicked the notification."""
+        if self._proposal is None:
+            return
+        date, start_time, end_time = self._proposal
+        self._proposal = None
+        self.data_manager.add_entry(date, start_time, end_time)
+        self.update_tooltip()